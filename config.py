@@ -4,10 +4,13 @@ Central configuration for all sources, categories, and settings.
 """
 
 import os
+import sys
+import json
 from dotenv import load_dotenv
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
 from enum import Enum
-from typing import List, Optional
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
 
 load_dotenv()
 
@@ -28,7 +31,7 @@ class Category(Enum):
     SPANISH = "🇪🇸 En Español"
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Source:
     name: str
     url: str
@@ -36,13 +39,18 @@ class Source:
     category: Category
     enabled: bool = True
     rss_url: Optional[str] = None  # For RSS sources
+    refresh_minutes: int = 360  # RSS only: minimum age of the last fetch before polling again
+    # Fetch state from the last run (see load_source_state)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    last_fetched_at: Optional[datetime] = None
 
 
 # =============================================================================
 # ALL 17 SOURCES CONFIGURATION
 # =============================================================================
 
-SOURCES: List[Source] = [
+SOURCES: Tuple[Source, ...] = (
     # --- OFFICIAL BLOGS (RSS) ---
     Source(
         name="OpenAI Blog",
@@ -104,6 +112,7 @@ SOURCES: List[Source] = [
         rss_url="https://techcrunch.com/category/artificial-intelligence/feed/",
         source_type=SourceType.RSS,
         category=Category.INDUSTRY,
+        refresh_minutes=30,  # High-volume feed
     ),
     Source(
         name="The Decoder",
@@ -190,7 +199,23 @@ SOURCES: List[Source] = [
         source_type=SourceType.CUSTOM,
         category=Category.RELEASES,
     ),
-]
+)
+
+# Interned names: articles built from these share one string object per
+# source/category, so set and dict lookups on them short-circuit on identity
+SOURCE_NAMES: FrozenSet[str] = frozenset(sys.intern(s.name) for s in SOURCES)
+CATEGORY_NAMES: FrozenSet[str] = frozenset(sys.intern(c.value) for c in Category)
+
+# Precomputed groupings so callers don't re-filter SOURCES on every run
+SOURCES_BY_TYPE: Dict[SourceType, Tuple[Source, ...]] = {
+    source_type: tuple(s for s in SOURCES if s.source_type == source_type)
+    for source_type in SourceType
+}
+
+SOURCES_BY_CATEGORY: Dict[Category, Tuple[Source, ...]] = {
+    category: tuple(s for s in SOURCES if s.category == category)
+    for category in Category
+}
 
 
 # =============================================================================
@@ -277,6 +302,76 @@ TIMEZONE = os.getenv("TIMEZONE", "America/Argentina/Buenos_Aires")
 
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), "data", "sent_articles.db")
 
+# Per-source fetch state (ETag / Last-Modified) persisted between runs
+SOURCE_STATE_PATH = os.path.join(os.path.dirname(__file__), "data", "source_state.json")
+
+
+def load_source_state(
+    path: str = SOURCE_STATE_PATH,
+    sources: Tuple[Source, ...] = SOURCES
+) -> Tuple[Source, ...]:
+    """
+    Return sources with their saved fetch state applied.
+    
+    Fetchers send these as If-None-Match / If-Modified-Since so unchanged
+    feeds answer 304 with no body, then report the new values back so the
+    caller can persist them with save_source_state.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return sources
+    
+    def _apply(s: Source) -> Source:
+        saved = state.get(s.name)
+        if not saved:
+            return s
+        fetched_at = saved.get("last_fetched_at")
+        return replace(
+            s,
+            etag=saved.get("etag"),
+            last_modified=saved.get("last_modified"),
+            last_fetched_at=datetime.fromisoformat(fetched_at) if fetched_at else None,
+        )
+    
+    return tuple(_apply(s) for s in sources)
+
+
+def save_source_state(path: str, sources: Tuple[Source, ...]):
+    """Persist each source's fetch state to the sidecar JSON file."""
+    state = {
+        s.name: {
+            "etag": s.etag,
+            "last_modified": s.last_modified,
+            "last_fetched_at": s.last_fetched_at.isoformat() if s.last_fetched_at else None,
+        }
+        for s in sources
+        if s.etag or s.last_modified or s.last_fetched_at
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def due_sources(now: datetime, sources: Iterable[Source] = SOURCES) -> Iterable[Source]:
+    """Yield enabled sources whose last fetch is at least refresh_minutes old."""
+    for s in sources:
+        if not s.enabled:
+            continue
+        if s.last_fetched_at is None or now - s.last_fetched_at >= timedelta(minutes=s.refresh_minutes):
+            yield s
+
+
+# =============================================================================
+# GITHUB PAGES CONFIGURATION
+# =============================================================================
+
+# Also write gzip-precompressed copies (digest-*.html.gz) next to the HTML.
+# Off by default: GitHub Pages never serves them, and the workflow would
+# commit them every day; enable only for hosts with gzip_static support
+ARCHIVE_PRECOMPRESS = os.getenv("ARCHIVE_PRECOMPRESS", "false").lower() == "true"
+
 
 # =============================================================================
 # PROCESSING CONFIGURATION
@@ -291,3 +386,4 @@ LOOKBACK_HOURS = 24
 # Summary configuration
 SUMMARY_MAX_WORDS = 50  # Max words per article summary
 BATCH_SIZE = 5  # Articles to summarize in one API call
+SUMMARIZER_CACHE_TTL_HOURS = int(os.getenv("SUMMARIZER_CACHE_TTL", "72"))  # Reuse LLM/translator responses this long
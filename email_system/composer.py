@@ -3,41 +3,89 @@ Email Composer
 Generates HTML email digest from articles.
 """
 
-from jinja2 import Environment
-from datetime import datetime
-from typing import List, Dict
+from jinja2 import DictLoader, Environment, FileSystemBytecodeCache, select_autoescape
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from typing import Any, List, Dict, Optional
 from dataclasses import dataclass
+from lxml import etree
+from lxml import html as lxml_html
 import html
+import io
+import os
 import re
 
 
-def strip_html_tags(text: str) -> str:
-    """Remove HTML tags, images, and clean up the text."""
-    if not text:
-        return ""
+_RE_IMG = re.compile(r'<img[^>]*>', re.IGNORECASE)
+_RE_TAG = re.compile(r'<[^>]+>')
+_RE_WS = re.compile(r'\s+')
+
+# Category name -> CSS class suffix
+_SLUG_MAP = {
+    "🚀 Lanzamientos de Modelos": "releases",
+    "📄 Research & Papers": "research",
+    "📊 Benchmarks & Rankings": "benchmarks",
+    "📰 Noticias de Industria": "industry",
+    "🛠️ Herramientas & APIs": "tools",
+    "🇪🇸 En Español": "spanish",
+}
+
+
+def _strip_html_regex(text: str) -> str:
+    """Regex fallback for markup lxml refuses to parse."""
     # Remove img tags
-    text = re.sub(r'<img[^>]*>', '', text, flags=re.IGNORECASE)
+    text = _RE_IMG.sub('', text)
     # Remove all other HTML tags
-    text = re.sub(r'<[^>]+>', '', text)
+    text = _RE_TAG.sub('', text)
     # Clean up whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _RE_WS.sub(' ', text).strip()
     return text
 
 
+def strip_html_tags(text: str) -> str:
+    """Remove HTML tags, images, and clean up the text."""
+    if not text:
+        return ""
+    if '<' not in text:
+        # Already clean (common for feed summaries): return as-is. isprintable()
+        # rejects every whitespace char except the ASCII space.
+        if (text.isprintable() and '  ' not in text
+                and text[0] != ' ' and text[-1] != ' '):
+            return text
+        # Plain text: no parse tree needed, just collapse whitespace
+        return ' '.join(text.split())
+    # Single pass through libxml2's tokenizer; images carry no text
+    try:
+        fragment = lxml_html.fragment_fromstring(text, create_parent='div')
+        return ' '.join(fragment.text_content().split())
+    except (etree.ParserError, ValueError):
+        return _strip_html_regex(text)
+
+
+# Spanish day and month names
+_DAYS_ES = ('Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo')
+_MONTHS_ES = ('enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
+              'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre')
+
+
+@lru_cache(maxsize=32)
+def _format_date_es(d: date) -> str:
+    """Header date, e.g. 'Lunes, 5 de enero de 2026'."""
+    return f"{_DAYS_ES[d.weekday()]}, {d.day} de {_MONTHS_ES[d.month - 1]} de {d.year}"
+
+
+@lru_cache(maxsize=32)
+def _format_archive_es(d: date) -> str:
+    """Archive link label, e.g. 'Lunes 5'."""
+    return f"{_DAYS_ES[d.weekday()]} {d.day}"
+
+
 def _slugify(text: str) -> str:
     """Convert category name to CSS class."""
-    mapping = {
-        "🚀 Lanzamientos de Modelos": "releases",
-        "📄 Research & Papers": "research",
-        "📊 Benchmarks & Rankings": "benchmarks",
-        "📰 Noticias de Industria": "industry",
-        "🛠️ Herramientas & APIs": "tools",
-        "🇪🇸 En Español": "spanish",
-    }
-    return mapping.get(text, "default")
+    return _SLUG_MAP.get(text, "default")
 
 
-@dataclass
+@dataclass(slots=True)
 class Article:
     """Represents a single news article."""
     id: str
@@ -45,22 +93,15 @@ class Article:
     url: str
     source: str
     category: str
-    published: any
+    published: Any
     summary: str
     content: str = None
     author: str = None
     summary_es: str = None
 
 
-# HTML Email Template
-EMAIL_TEMPLATE = """
-<!DOCTYPE html>
-<html lang="es">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{{ subject }}</title>
-    <style>
+# Digest stylesheet: inlined in emails (clients strip <link>), shared file for the archive
+DIGEST_CSS = """
         * {
             margin: 0;
             padding: 0;
@@ -224,7 +265,19 @@ EMAIL_TEMPLATE = """
             color: white;
             border-color: #667eea;
         }
-    </style>
+"""
+
+# HTML Email Template
+EMAIL_TEMPLATE = """
+<!DOCTYPE html>
+<html lang="es">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{{ subject }}</title>
+    {% block styles %}
+    <style>""" + DIGEST_CSS + """    </style>
+    {% endblock %}
 </head>
 <body>
     <div class="container">
@@ -277,75 +330,104 @@ EMAIL_TEMPLATE = """
 </html>
 """
 
+# GitHub Pages archive: same page, stylesheet linked so browsers cache it across days
+ARCHIVE_TEMPLATE = """{% extends "digest.html" %}
+{% block styles %}
+    <link rel="stylesheet" href="assets/digest.css">
+{% endblock %}
+"""
+
+
+# Shared Jinja environment: the template is compiled once per process, and the
+# bytecode cache (loader-backed templates only) amortizes it across restarts.
+_ENV = Environment(
+    loader=DictLoader({
+        "digest.html": EMAIL_TEMPLATE,
+        "archive.html": ARCHIVE_TEMPLATE,
+    }),
+    autoescape=select_autoescape(["html"]),
+    bytecode_cache=FileSystemBytecodeCache(),
+)
+# Register custom filters BEFORE compiling the template
+_ENV.filters['slug'] = _slugify
+_ENV.filters['strip_html'] = strip_html_tags
+_TEMPLATE = _ENV.get_template("digest.html")
+_ARCHIVE_TEMPLATE = _ENV.get_template("archive.html")
+
+STYLESHEET_PATH = os.path.join("assets", "digest.css")
+
+
+def _list_archive_files(docs_dir: str) -> set:
+    """Names of digest-*.html files in docs_dir, from a single directory read."""
+    try:
+        with os.scandir(docs_dir) as it:
+            return {
+                entry.name for entry in it
+                if entry.name.startswith("digest-") and entry.name.endswith(".html")
+            }
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
+def _ensure_stylesheet(docs_dir: str):
+    """Write docs/assets/digest.css if it is missing or out of date."""
+    path = os.path.join(docs_dir, STYLESHEET_PATH)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == DIGEST_CSS:
+                return
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(DIGEST_CSS)
+
 
 class EmailComposer:
     """Composes HTML email digest."""
     
     def __init__(self):
-        # Create environment with custom filters BEFORE compiling template
-        self.env = Environment()
-        self.env.filters['slug'] = _slugify
-        self.env.filters['strip_html'] = strip_html_tags
-        self.template = self.env.from_string(EMAIL_TEMPLATE)
+        self.env = _ENV
+        self.template = _TEMPLATE
+        self.archive_template = _ARCHIVE_TEMPLATE
     
-    def compose(
+    def _prepare(
         self,
         grouped_articles: Dict[str, List[Article]],
-        subject_prefix: str = "🤖 infoIA",
-        docs_dir: str = None
-    ) -> tuple[str, str]:
-        """
-        Compose HTML email.
-        
-        Returns:
-            Tuple of (subject, html_body)
-        """
-        import os
-        import glob
-        from datetime import timedelta
-        
-        today = datetime.now()
-        
-        # Spanish day and month names
-        days_es = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
-        months_es = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio',
-                     'julio', 'agosto', 'septiembre', 'octubre', 'noviembre', 'diciembre']
-        
-        day_name = days_es[today.weekday()]
-        month_name = months_es[today.month - 1]
-        date_str = f"{day_name}, {today.day} de {month_name} de {today.year}"
+        subject_prefix: str,
+        docs_dir: str,
+        for_archive: bool,
+        now: Optional[datetime] = None
+    ) -> tuple:
+        """Build (subject, template, context) shared by compose and compose_to_file."""
+        today = now or datetime.now()
+        date_str = _format_date_es(today.date())
         
         # Calculate stats
         total_articles = sum(len(arts) for arts in grouped_articles.values())
         total_categories = len(grouped_articles)
-        sources = set()
-        for articles in grouped_articles.values():
-            for article in articles:
-                sources.add(article.source)
+        sources = {article.source for articles in grouped_articles.values() for article in articles}
         
         # Get archive dates from existing files (last 7 days, excluding today)
         archive_dates = []
-        if docs_dir and os.path.exists(docs_dir):
-            today_str = today.strftime("%Y-%m-%d")
-            for i in range(1, 8):  # Last 7 days
-                past_date = today - timedelta(days=i)
-                past_str = past_date.strftime("%Y-%m-%d")
-                filename = f"digest-{past_str}.html"
-                filepath = os.path.join(docs_dir, filename)
+        existing = _list_archive_files(docs_dir) if docs_dir else set()
+        if existing:
+            past_dates = [today - timedelta(days=i) for i in range(1, 8)]  # Last 7 days
+            for past_date in past_dates:
+                filename = f"digest-{past_date:%Y-%m-%d}.html"
                 
-                if os.path.exists(filepath):
-                    # Format display date in Spanish
-                    past_day_name = days_es[past_date.weekday()]
-                    past_month_name = months_es[past_date.month - 1]
-                    display = f"{past_day_name} {past_date.day}"
+                if filename in existing:
                     archive_dates.append({
                         "filename": filename,
-                        "display": display,
+                        "display": _format_archive_es(past_date.date()),
                         "date": past_date
                     })
         
-        # Render HTML
-        html_body = self.template.render(
+        template = self.template
+        if for_archive and docs_dir:
+            _ensure_stylesheet(docs_dir)
+            template = self.archive_template
+        
+        context = dict(
             subject=subject_prefix,
             date=date_str,
             grouped_articles=grouped_articles,
@@ -355,39 +437,95 @@ class EmailComposer:
             archive_dates=archive_dates
         )
         
-        
         # Generate subject line
-        subject = f"{subject_prefix} - {today.strftime('%d/%m/%Y')} ({total_articles} artículos)"
+        subject = f"{subject_prefix} - {today:%d/%m/%Y} ({total_articles} artículos)"
+        
+        return subject, template, context
+    
+    def compose(
+        self,
+        grouped_articles: Dict[str, List[Article]],
+        subject_prefix: str = "🤖 infoIA",
+        docs_dir: str = None,
+        for_archive: bool = False,
+        now: Optional[datetime] = None
+    ) -> tuple[str, str]:
+        """
+        Compose HTML email.
+        
+        With for_archive=True (and a docs_dir), the page links the shared
+        assets/digest.css instead of inlining the stylesheet. Pass now to
+        render several outputs against the same timestamp.
+        
+        Returns:
+            Tuple of (subject, html_body)
+        """
+        subject, template, context = self._prepare(
+            grouped_articles, subject_prefix, docs_dir, for_archive, now
+        )
+        
+        # Render HTML
+        html_body = template.render(**context)
         
         return subject, html_body
     
-    def compose_plain_text(self, grouped_articles: Dict[str, List[Article]]) -> str:
+    def compose_to_file(
+        self,
+        grouped_articles: Dict[str, List[Article]],
+        path: str,
+        subject_prefix: str = "🤖 infoIA",
+        docs_dir: str = None,
+        for_archive: bool = False,
+        now: Optional[datetime] = None
+    ) -> str:
+        """
+        Stream-render the HTML digest straight into a file.
+        
+        Chunks are written as Jinja produces them, so the full page is never
+        held in memory. Same options as compose().
+        
+        Returns:
+            The subject line
+        """
+        subject, template, context = self._prepare(
+            grouped_articles, subject_prefix, docs_dir, for_archive, now
+        )
+        
+        stream = template.stream(**context)
+        stream.enable_buffering(size=32)
+        with open(path, "w", encoding="utf-8") as f:
+            stream.dump(f)
+        
+        return subject
+    
+    def compose_plain_text(
+        self,
+        grouped_articles: Dict[str, List[Article]],
+        now: Optional[datetime] = None
+    ) -> str:
         """Generate plain text version of email."""
-        lines = []
-        lines.append("=" * 50)
-        lines.append("🤖 INFOIA")
-        lines.append(f"📅 {datetime.now().strftime('%d/%m/%Y')}")
-        lines.append("=" * 50)
-        lines.append("")
+        today = now or datetime.now()
+        rule = "=" * 50
+        buf = io.StringIO()
+        w = buf.write
+        w(f"{rule}\n🤖 INFOIA\n📅 {today:%d/%m/%Y}\n{rule}\n\n")
         
         for category, articles in grouped_articles.items():
-            lines.append(f"\n{category}")
-            lines.append("-" * 40)
+            w(f"\n{category}\n{'-' * 40}\n")
             
             for article in articles:
-                lines.append(f"\n• {article.title}")
-                lines.append(f"  Fuente: {article.source}")
-                lines.append(f"  URL: {article.url}")
+                w(f"\n• {article.title}\n  Fuente: {article.source}\n  URL: {article.url}\n")
                 summary = article.summary_es or article.summary
                 if summary:
-                    lines.append(f"  Resumen: {summary[:200]}...")
+                    if len(summary) > 200:
+                        summary = summary[:200]
+                    w(f"  Resumen: {summary}...\n")
             
-            lines.append("")
+            w("\n")
         
-        lines.append("=" * 50)
-        lines.append("Generado por AI News Aggregator")
+        w(f"{rule}\nGenerado por AI News Aggregator")
         
-        return "\n".join(lines)
+        return buf.getvalue()
 
 
 def compose_email_digest(grouped_articles: Dict[str, List[Article]]) -> tuple[str, str, str]:
@@ -398,8 +536,9 @@ def compose_email_digest(grouped_articles: Dict[str, List[Article]]) -> tuple[st
         Tuple of (subject, html_body, plain_text_body)
     """
     composer = EmailComposer()
-    subject, html_body = composer.compose(grouped_articles)
-    plain_text = composer.compose_plain_text(grouped_articles)
+    now = datetime.now()
+    subject, html_body = composer.compose(grouped_articles, now=now)
+    plain_text = composer.compose_plain_text(grouped_articles, now=now)
     return subject, html_body, plain_text
 
 
@@ -407,6 +546,7 @@ if __name__ == "__main__":
     # Test with sample data
     from datetime import datetime
     
+    now = datetime.now()
     test_articles = {
         "🚀 Lanzamientos de Modelos": [
             Article(
@@ -415,7 +555,7 @@ if __name__ == "__main__":
                 url="https://openai.com/blog/gpt-5",
                 source="OpenAI Blog",
                 category="🚀 Lanzamientos de Modelos",
-                published=datetime.now(),
+                published=now,
                 summary="GPT-5 representa un avance significativo en capacidades de razonamiento.",
                 summary_es="OpenAI ha lanzado GPT-5, su modelo más avanzado hasta la fecha, con capacidades de razonamiento mejoradas."
             )
@@ -427,7 +567,7 @@ if __name__ == "__main__":
                 url="https://arxiv.org/abs/xxx",
                 source="arXiv",
                 category="📄 Research & Papers",
-                published=datetime.now(),
+                published=now,
                 summary="A new attention mechanism...",
                 summary_es="Un nuevo mecanismo de atención supera a los transformers tradicionales en múltiples benchmarks."
             )
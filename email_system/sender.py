@@ -3,17 +3,31 @@ Email Sender
 Sends emails via SMTP with support for Gmail and other providers.
 """
 
+import asyncio
 import smtplib
 import ssl
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from typing import List, Optional
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.message import EmailMessage
+from email.policy import SMTP as SMTP_POLICY
+from typing import List, Optional, Tuple
 import os
 
 
 class EmailSender:
     """Sends emails via SMTP."""
     
+    # Port 465 speaks TLS from the first byte (no STARTTLS upgrade round trip)
+    SMTPS_PORT = 465
+    
+    # Concurrent SMTP sessions used by send_async
+    ASYNC_WORKERS = 4
+    
+    # Worker threads (one SMTP session each) and retries for send_personalized
+    PERSONALIZED_WORKERS = 8
+    PERSONALIZED_RETRIES = 3
+    
     def __init__(
         self,
         smtp_host: str = None,
@@ -25,10 +39,80 @@ class EmailSender:
         self.smtp_port = smtp_port or int(os.getenv("EMAIL_SMTP_PORT", "587"))
         self.username = username or os.getenv("EMAIL_USER", "")
         self.password = password or os.getenv("EMAIL_PASSWORD", "")
+        self._smtp: Optional[smtplib.SMTP] = None
         
         if not self.username or not self.password:
             print("[Email] Warning: Email credentials not configured")
     
+    def __enter__(self):
+        """Open one authenticated SMTP session shared by all sends in the block."""
+        self._smtp = self._connect()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def close(self):
+        """Close the shared SMTP session, if any."""
+        if self._smtp:
+            try:
+                self._smtp.quit()
+            except smtplib.SMTPException:
+                pass
+            finally:
+                self._smtp = None
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Create secure connection and log in."""
+        context = ssl.create_default_context()
+        
+        if self.smtp_port == self.SMTPS_PORT:
+            server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, context=context)
+        else:
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port)
+            server.ehlo()
+            server.starttls(context=context)
+            server.ehlo()
+        server.login(self.username, self.password)
+        return server
+    
+    def build_message(
+        self,
+        to_addresses: List[str],
+        subject: str,
+        html_body: str,
+        plain_text_body: str = None,
+        from_name: str = "AI News Aggregator"
+    ) -> EmailMessage:
+        """Build a multipart/alternative message with optional plain text."""
+        message = EmailMessage(policy=SMTP_POLICY)
+        message["Subject"] = subject
+        message["From"] = f"{from_name} <{self.username}>"
+        message["To"] = ", ".join(to_addresses)
+        
+        if plain_text_body:
+            # Plain text part first, HTML as the preferred alternative
+            message.set_content(plain_text_body, subtype="plain", charset="utf-8")
+            message.add_alternative(html_body, subtype="html", charset="utf-8")
+        else:
+            message.set_content(html_body, subtype="html", charset="utf-8")
+        
+        return message
+    
+    def _deliver(self, message: EmailMessage, to_addresses: List[str]):
+        """Send over the open session, or a one-off connection outside a `with` block."""
+        if self._smtp is None:
+            with self._connect() as server:
+                server.send_message(message, self.username, to_addresses)
+            return
+        
+        try:
+            self._smtp.send_message(message, self.username, to_addresses)
+        except smtplib.SMTPServerDisconnected:
+            # Server dropped the idle session: reconnect once and retry
+            self._smtp = self._connect()
+            self._smtp.send_message(message, self.username, to_addresses)
+    
     def send(
         self,
         to_addresses: List[str],
@@ -59,34 +143,10 @@ class EmailSender:
             return False
         
         try:
-            # Create message
-            message = MIMEMultipart("alternative")
-            message["Subject"] = subject
-            message["From"] = f"{from_name} <{self.username}>"
-            message["To"] = ", ".join(to_addresses)
-            
-            # Add plain text part
-            if plain_text_body:
-                part1 = MIMEText(plain_text_body, "plain", "utf-8")
-                message.attach(part1)
-            
-            # Add HTML part
-            part2 = MIMEText(html_body, "html", "utf-8")
-            message.attach(part2)
-            
-            # Create secure connection and send
-            context = ssl.create_default_context()
-            
-            with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                server.ehlo()
-                server.starttls(context=context)
-                server.ehlo()
-                server.login(self.username, self.password)
-                server.sendmail(
-                    self.username,
-                    to_addresses,
-                    message.as_string()
-                )
+            message = self.build_message(
+                to_addresses, subject, html_body, plain_text_body, from_name
+            )
+            self._deliver(message, to_addresses)
             
             print(f"[Email] Successfully sent to {len(to_addresses)} recipient(s)")
             return True
@@ -102,6 +162,208 @@ class EmailSender:
             print(f"[Email] Error sending email: {e}")
             return False
     
+    def send_batch(self, messages: List[EmailMessage]) -> int:
+        """
+        Send several prebuilt messages over a single SMTP session.
+        
+        Args:
+            messages: Messages from build_message (recipients read from "To")
+        
+        Returns:
+            Number of messages sent successfully
+        """
+        if not self.username or not self.password:
+            print("[Email] Error: Email credentials not configured")
+            return 0
+        
+        owns_connection = self._smtp is None
+        sent = 0
+        
+        try:
+            if owns_connection:
+                self._smtp = self._connect()
+            
+            for message in messages:
+                to_addresses = [
+                    addr.strip() for addr in message["To"].split(",") if addr.strip()
+                ]
+                try:
+                    self._deliver(message, to_addresses)
+                    sent += 1
+                except smtplib.SMTPException as e:
+                    print(f"[Email] SMTP error sending to {message['To']}: {e}")
+            
+        except smtplib.SMTPAuthenticationError:
+            print(f"[Email] Authentication failed. Check your credentials.")
+        except smtplib.SMTPException as e:
+            print(f"[Email] SMTP error: {e}")
+        except Exception as e:
+            print(f"[Email] Error sending batch: {e}")
+        finally:
+            if owns_connection:
+                self.close()
+        
+        print(f"[Email] Batch sent {sent}/{len(messages)} message(s)")
+        return sent
+    
+    async def send_async(self, messages: List[EmailMessage]) -> int:
+        """
+        Send prebuilt messages concurrently with aiosmtplib.
+        
+        Each worker keeps its own authenticated session and drains a shared
+        queue, so RTT waits overlap without paying a handshake per message.
+        
+        Returns:
+            Number of messages sent successfully
+        """
+        try:
+            import aiosmtplib
+        except ImportError:
+            print("[Email] aiosmtplib not installed; falling back to send_batch")
+            return await asyncio.to_thread(self.send_batch, messages)
+        
+        if not self.username or not self.password:
+            print("[Email] Error: Email credentials not configured")
+            return 0
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        
+        async def worker() -> int:
+            sent = 0
+            smtp = aiosmtplib.SMTP(
+                hostname=self.smtp_host,
+                port=self.smtp_port,
+                use_tls=self.smtp_port == self.SMTPS_PORT,
+                tls_context=ssl.create_default_context(),
+            )
+            async with smtp:
+                await smtp.login(self.username, self.password)
+                while not queue.empty():
+                    message = queue.get_nowait()
+                    try:
+                        await smtp.send_message(message)
+                        sent += 1
+                    except aiosmtplib.SMTPException as e:
+                        print(f"[Email] SMTP error sending to {message['To']}: {e}")
+            return sent
+        
+        workers = min(len(messages), self.ASYNC_WORKERS)
+        results = await asyncio.gather(
+            *(worker() for _ in range(workers)),
+            return_exceptions=True
+        )
+        
+        sent = 0
+        for result in results:
+            if isinstance(result, int):
+                sent += result
+            else:
+                print(f"[Email] Async worker error: {result}")
+        
+        print(f"[Email] Async sent {sent}/{len(messages)} message(s)")
+        return sent
+    
+    def send_personalized(
+        self,
+        messages: List[Tuple[str, Optional[str], Optional[str]]],
+        subject: str,
+        html_body: str,
+        plain_text_body: str = None,
+        from_name: str = "AI News Aggregator"
+    ) -> int:
+        """
+        Send one message per recipient from a thread pool.
+        
+        Each worker thread keeps its own persistent SMTP session. Transient
+        refusals (4xx, e.g. 421) are retried with exponential backoff.
+        
+        Args:
+            messages: (address, subject_override, html_override) tuples; None
+                keeps the shared subject / html_body
+            subject: Default subject line
+            html_body: Default HTML content
+            plain_text_body: Optional plain text fallback (shared)
+            from_name: Display name for sender
+        
+        Returns:
+            Number of messages sent successfully
+        """
+        if not self.username or not self.password:
+            print("[Email] Error: Email credentials not configured")
+            return 0
+        
+        if not messages:
+            return 0
+        
+        local = threading.local()
+        senders: List[EmailSender] = []
+        senders_lock = threading.Lock()
+        
+        def worker_sender() -> "EmailSender":
+            sender = getattr(local, "sender", None)
+            if sender is None:
+                sender = EmailSender(
+                    self.smtp_host, self.smtp_port, self.username, self.password
+                ).__enter__()
+                local.sender = sender
+                with senders_lock:
+                    senders.append(sender)
+            return sender
+        
+        def deliver(item: Tuple[str, Optional[str], Optional[str]]) -> bool:
+            address, subject_override, html_override = item
+            message = self.build_message(
+                [address],
+                subject_override or subject,
+                html_override or html_body,
+                plain_text_body,
+                from_name
+            )
+            
+            for attempt in range(self.PERSONALIZED_RETRIES):
+                try:
+                    worker_sender()._deliver(message, [address])
+                    return True
+                except smtplib.SMTPRecipientsRefused as e:
+                    codes = [code for code, _ in e.recipients.values()]
+                    transient = any(400 <= code < 500 for code in codes)
+                    error = e
+                except smtplib.SMTPResponseException as e:
+                    transient = 400 <= e.smtp_code < 500
+                    error = e
+                    if e.smtp_code == 421:
+                        # Server is closing the session: reconnect on retry
+                        # (unset if the 421 came while connecting)
+                        sender = getattr(local, "sender", None)
+                        if sender is not None:
+                            sender.close()
+                            with senders_lock:
+                                senders.remove(sender)
+                            local.sender = None
+                except Exception as e:
+                    print(f"[Email] Error sending to {address}: {e}")
+                    return False
+                
+                if not transient or attempt == self.PERSONALIZED_RETRIES - 1:
+                    print(f"[Email] SMTP error sending to {address}: {error}")
+                    return False
+                time.sleep(2 ** attempt)
+            
+            return False
+        
+        workers = min(len(messages), self.PERSONALIZED_WORKERS)
+        try:
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="smtp") as pool:
+                sent = sum(pool.map(deliver, messages))
+        finally:
+            for sender in senders:
+                sender.close()
+        
+        print(f"[Email] Personalized sent {sent}/{len(messages)} message(s)")
+        return sent
+    
     def send_test(self) -> bool:
         """Send a test email to verify configuration."""
         test_html = """
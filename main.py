@@ -3,9 +3,12 @@ AI News Aggregator - Main Entry Point
 Orchestrates the entire pipeline: fetch → process → summarize → email
 """
 
+import aiohttp
 import asyncio
 import argparse
+import gzip
 import schedule
+import shutil
 import time
 import sys
 import os
@@ -14,9 +17,16 @@ import os
 if sys.platform == 'win32':
     sys.stdout.reconfigure(encoding='utf-8', errors='replace')
     sys.stderr.reconfigure(encoding='utf-8', errors='replace')
+from collections import Counter
 from datetime import datetime
+from dataclasses import replace
 from typing import List, Dict
 
+try:
+    import uvloop
+except ImportError:  # Optional dependency
+    uvloop = None
+
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -25,10 +35,12 @@ load_dotenv()
 
 # Import configuration
 from config import (
-    SOURCES, SourceType, Category,
-    LOOKBACK_HOURS, MAX_ARTICLES_PER_SOURCE,
+    SOURCES_BY_TYPE, SourceType, Category,
+    SOURCE_STATE_PATH, load_source_state, save_source_state, due_sources,
+    LOOKBACK_HOURS, MAX_ARTICLES_PER_SOURCE, SUMMARIZER_CACHE_TTL_HOURS,
     EMAIL_TO, SEND_HOUR, SEND_MINUTE,
-    ARXIV_MAX_RESULTS, ARXIV_CATEGORIES
+    ARXIV_MAX_RESULTS, ARXIV_CATEGORIES,
+    ARCHIVE_PRECOMPRESS
 )
 
 # Import scrapers
@@ -37,80 +49,170 @@ from scrapers.arxiv_fetcher import ArxivFetcher
 from scrapers.huggingface_fetcher import HuggingFaceFetcher
 from scrapers.web_scraper import WebScraper
 from scrapers.llm_tracker import LLMTracker
+from scrapers.host_gate import HostGate
+from scrapers.exact_dedup import ExactDedup
 
 # Import processing
 from processing.deduplicator import Deduplicator
 from processing.categorizer import Categorizer
-from processing.summarizer import Summarizer
+from processing.summarizer import Summarizer, aclose as close_groq_client
+from processing.llm_cache import LLMCache
+from processing.near_dup import drop_near_duplicates
 
 # Import email system
 from email_system.composer import EmailComposer
 from email_system.sender import EmailSender
 
 
+def link_or_copy(src: str, dst: str):
+    """Hardlink dst to src (replacing dst), copying if links aren't supported."""
+    try:
+        os.remove(dst)
+    except FileNotFoundError:
+        pass
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+
+
 class AINewsAggregator:
     """Main aggregator class that orchestrates the pipeline."""
     
     def __init__(self, test_mode: bool = False):
         self.test_mode = test_mode
         self.articles = []
+        self.source_state = load_source_state(sources=SOURCES_BY_TYPE[SourceType.RSS])
+        # (grouped_articles, (subject, html, plain_text)) of the last email composed
+        self._composed = None
     
-    async def fetch_all_sources(self) -> List:
-        """Fetch articles from all configured sources."""
+    def compose_email(self, grouped_articles: Dict[str, List]) -> tuple:
+        """Compose (subject, html, plain_text) once per grouped result."""
+        if self._composed is None or self._composed[0] is not grouped_articles:
+            composer = EmailComposer()
+            now = datetime.now()
+            subject, html_body = composer.compose(grouped_articles, now=now)
+            plain_text = composer.compose_plain_text(grouped_articles, now=now)
+            self._composed = (grouped_articles, (subject, html_body, plain_text))
+        return self._composed[1]
+    
+    async def fetch_all_sources(self, full: bool = False) -> List:
+        """
+        Fetch articles from all configured sources.
+        
+        Args:
+            full: Poll every RSS feed unconditionally (no refresh interval,
+                no ETag / Last-Modified), for outputs that are full snapshots
+        """
         all_articles = []
+        started_at = datetime.now()
         
         print("\n" + "=" * 50)
         print("📡 FETCHING FROM ALL SOURCES")
         print("=" * 50)
         
-        # 1. RSS Sources
+        # 1. RSS Sources (a skipped or 304 feed contributes nothing, so a
+        # full snapshot must not throttle or revalidate)
+        if full:
+            polled = [s for s in self.source_state if s.enabled]
+        else:
+            polled = due_sources(started_at, self.source_state)
         rss_sources = [
             {
                 "rss_url": s.rss_url,
                 "name": s.name,
-                "category": s.category.value
+                "category": s.category.value,
+                "etag": None if full else s.etag,
+                "last_modified": None if full else s.last_modified
             }
-            for s in SOURCES
-            if s.source_type == SourceType.RSS and s.enabled and s.rss_url
+            for s in polled
+            if s.rss_url
         ]
         
-        if rss_sources:
+        # Per-host politeness shared by the RSS and web fetchers
+        gate = HostGate()
+        # Drops exact title+summary repeats across all fetchers
+        exact_dedup = ExactDedup()
+        # One connection pool (keep-alive, DNS cache) shared by every fetcher;
+        # a small per-host limit keeps feeds on one host (e.g. substack) from
+        # hogging the pool, cleanup_closed aborts half-closed TLS transports
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=50, limit_per_host=4, ttl_dns_cache=600, enable_cleanup_closed=True
+            )
+        )
+        
+        async def fetch_rss() -> List:
+            if not rss_sources:
+                return []
             print(f"\n📰 Fetching {len(rss_sources)} RSS feeds...")
-            async with RSSFetcher(lookback_hours=LOOKBACK_HOURS) as fetcher:
+            async with RSSFetcher(
+                lookback_hours=LOOKBACK_HOURS, gate=gate, session=session, exact_dedup=exact_dedup
+            ) as fetcher:
                 rss_articles = await fetcher.fetch_all(rss_sources)
-                all_articles.extend(rss_articles)
+            
+            # Remember new fetch state; persisted once the run succeeds
+            self.source_state = tuple(
+                replace(s, etag=fetcher.validators[s.rss_url][0],
+                        last_modified=fetcher.validators[s.rss_url][1],
+                        last_fetched_at=started_at)
+                if s.rss_url in fetcher.validators else s
+                for s in self.source_state
+            )
+            return rss_articles
         
         # 2. arXiv Papers
-        print("\n📄 Fetching arXiv papers...")
-        async with ArxivFetcher(
-            max_results=ARXIV_MAX_RESULTS,
-            categories=ARXIV_CATEGORIES
-        ) as fetcher:
-            arxiv_articles = await fetcher.fetch_papers(lookback_hours=LOOKBACK_HOURS)
-            all_articles.extend(arxiv_articles)
+        async def fetch_arxiv() -> List:
+            print("\n📄 Fetching arXiv papers...")
+            async with ArxivFetcher(
+                max_results=ARXIV_MAX_RESULTS,
+                categories=ARXIV_CATEGORIES,
+                session=session,
+                exact_dedup=exact_dedup
+            ) as fetcher:
+                return await fetcher.fetch_papers(lookback_hours=LOOKBACK_HOURS)
         
         # 3. Hugging Face
-        print("\n🤗 Fetching Hugging Face content...")
-        async with HuggingFaceFetcher() as fetcher:
-            hf_articles = await fetcher.fetch_all()
-            all_articles.extend(hf_articles)
+        async def fetch_huggingface() -> List:
+            print("\n🤗 Fetching Hugging Face content...")
+            async with HuggingFaceFetcher(session=session, exact_dedup=exact_dedup) as fetcher:
+                return await fetcher.fetch_all()
         
         # 4. Web Scraping
-        print("\n🌐 Scraping web sources...")
-        async with WebScraper(lookback_hours=LOOKBACK_HOURS) as scraper:
-            web_articles = await scraper.fetch_all()
-            all_articles.extend(web_articles)
+        async def fetch_web() -> List:
+            print("\n🌐 Scraping web sources...")
+            async with WebScraper(
+                lookback_hours=LOOKBACK_HOURS, gate=gate, session=session, exact_dedup=exact_dedup
+            ) as scraper:
+                return await scraper.fetch_all()
         
         # 5. LLM Tracker
-        print("\n🔄 Checking LLM updates...")
-        async with LLMTracker() as tracker:
-            llm_articles = await tracker.check_all_providers()
-            all_articles.extend(llm_articles)
+        async def fetch_llm_updates() -> List:
+            print("\n🔄 Checking LLM updates...")
+            async with LLMTracker(session=session, exact_dedup=exact_dedup) as tracker:
+                return await tracker.check_all_providers()
+        
+        # Independent network workloads: run them all at once
+        async with session:
+            results = await asyncio.gather(
+                fetch_rss(),
+                fetch_arxiv(),
+                fetch_huggingface(),
+                fetch_web(),
+                fetch_llm_updates(),
+                return_exceptions=True
+            )
+        
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"❌ Fetcher error: {result}")
+            else:
+                all_articles.extend(result)
         
         print(f"\n✅ Total fetched: {len(all_articles)} articles")
         return all_articles
     
-    async def process_articles(self, articles: List) -> Dict[str, List]:
+    async def process_articles(self, articles: List, dedup: Deduplicator) -> Dict[str, List]:
         """Process articles: deduplicate, categorize, summarize."""
         print("\n" + "=" * 50)
         print("⚙️ PROCESSING ARTICLES")
@@ -118,30 +220,38 @@ class AINewsAggregator:
         
         # 1. Deduplicate
         print("\n🔍 Removing duplicates...")
-        async with Deduplicator() as dedup:
-            unique_articles = await dedup.filter_duplicates(articles)
-            
-            # Limit per source
-            from collections import defaultdict
-            by_source = defaultdict(list)
-            for article in unique_articles:
-                by_source[article.source].append(article)
-            
-            limited_articles = []
-            for source, arts in by_source.items():
-                limited_articles.extend(arts[:MAX_ARTICLES_PER_SOURCE])
-            
-            print(f"   After limiting: {len(limited_articles)} articles")
+        unique_articles = await dedup.filter_duplicates(articles)
+        
+        # Same story from two outlets in slightly different words: keep the first
+        before = len(unique_articles)
+        unique_articles = drop_near_duplicates(
+            unique_articles,
+            [f"{a.title} {a.summary}" for a in unique_articles],
+            shingle_size=5
+        )
+        if len(unique_articles) < before:
+            print(f"   Dropped {before - len(unique_articles)} near-duplicates")
+        
+        # Limit per source (single pass, keeps fetch order)
+        per_source = Counter()
+        limited_articles = []
+        for article in unique_articles:
+            if per_source[article.source] < MAX_ARTICLES_PER_SOURCE:
+                per_source[article.source] += 1
+                limited_articles.append(article)
+        
+        print(f"   After limiting: {len(limited_articles)} articles")
         
         # 2. Categorize
         print("\n📂 Categorizing...")
         categorizer = Categorizer()
         categorized = categorizer.categorize_all(limited_articles)
         
-        # 3. Summarize and translate
+        # 3. Summarize and translate (response cache shares the dedup DB)
         print("\n🌐 Summarizing and translating to Spanish...")
-        summarizer = Summarizer()
-        summarized = await summarizer.summarize_all(categorized)
+        llm_cache = await LLMCache(dedup.conn, ttl_hours=SUMMARIZER_CACHE_TTL_HOURS).init()
+        async with Summarizer(cache=llm_cache) as summarizer:
+            summarized = await summarizer.summarize_all(categorized)
         
         # 4. Group by category
         print("\n📊 Grouping by category...")
@@ -152,16 +262,14 @@ class AINewsAggregator:
         
         return grouped
     
-    async def send_digest(self, grouped_articles: Dict[str, List]) -> bool:
+    async def send_digest(self, grouped_articles: Dict[str, List], dedup: Deduplicator) -> bool:
         """Compose and send email digest."""
         print("\n" + "=" * 50)
         print("📧 SENDING EMAIL DIGEST")
         print("=" * 50)
         
         # Compose email
-        composer = EmailComposer()
-        subject, html_body = composer.compose(grouped_articles)
-        plain_text = composer.compose_plain_text(grouped_articles)
+        subject, html_body, plain_text = self.compose_email(grouped_articles)
         
         print(f"\n📝 Subject: {subject}")
         
@@ -192,9 +300,8 @@ class AINewsAggregator:
             print("✅ Email sent successfully!")
             
             # Mark articles as sent
-            async with Deduplicator() as dedup:
-                for category, arts in grouped_articles.items():
-                    await dedup.mark_batch_as_sent(arts)
+            for category, arts in grouped_articles.items():
+                await dedup.mark_batch_as_sent(arts)
         else:
             print("❌ Failed to send email")
         
@@ -210,25 +317,30 @@ class AINewsAggregator:
         docs_dir = os.path.join(os.path.dirname(__file__), "docs")
         os.makedirs(docs_dir, exist_ok=True)
         
-        # Compose HTML with archive links
+        # Stream the dated archive page straight to disk
         composer = EmailComposer()
-        subject, html_body = composer.compose(grouped_articles, docs_dir=docs_dir)
+        now = datetime.now()
+        archive_path = os.path.join(docs_dir, f"digest-{now:%Y-%m-%d}.html")
+        composer.compose_to_file(
+            grouped_articles, archive_path, docs_dir=docs_dir, for_archive=True, now=now
+        )
         
-        # Save to docs/index.html
+        # docs/index.html is the same page: hardlink instead of a second copy
         output_path = os.path.join(docs_dir, "index.html")
-        with open(output_path, "w", encoding="utf-8") as f:
-            f.write(html_body)
+        link_or_copy(archive_path, output_path)
         
         print(f"✅ Saved to: {output_path}")
-        
-        # Also save archive copy with date
-        date_str = datetime.now().strftime("%Y-%m-%d")
-        archive_path = os.path.join(docs_dir, f"digest-{date_str}.html")
-        with open(archive_path, "w", encoding="utf-8") as f:
-            f.write(html_body)
-        
         print(f"📁 Archive: {archive_path}")
         
+        if ARCHIVE_PRECOMPRESS:
+            # Links keep pointing at .html; servers with precompressed-file
+            # support (e.g. nginx gzip_static) pick up the .gz sibling
+            with open(archive_path, "rb") as src, \
+                    gzip.open(f"{archive_path}.gz", "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst)
+            link_or_copy(f"{archive_path}.gz", f"{output_path}.gz")
+            print(f"🗜️ Precompressed: {os.path.getsize(archive_path + '.gz'):,} bytes")
+        
         return True
     
     async def run(self, github_pages: bool = False) -> bool:
@@ -239,43 +351,56 @@ class AINewsAggregator:
         print("=" * 60)
         
         try:
-            # Fetch
-            articles = await self.fetch_all_sources()
-            
-            if not articles:
-                print("\n⚠️ No articles fetched. Check your internet connection.")
-                return False
-            
-            # Process
-            grouped = await self.process_articles(articles)
-            
-            if not grouped:
-                print("\n📭 No new articles to send today.")
-                return True
-            
-            # Output (GitHub Pages or Email)
-            if github_pages:
-                success = await self.save_to_github_pages(grouped)
-            else:
-                success = await self.send_digest(grouped)
-            
-            print("\n" + "=" * 60)
-            print("🏁 Pipeline completed!")
-            print("=" * 60)
-            
-            return success
-            
+            # One dedup connection for the whole run (filtering, summary cache, marking sent)
+            async with Deduplicator() as dedup:
+                # Fetch (GitHub Pages overwrites today's page with a full
+                # snapshot and never marks articles sent: fetch everything)
+                articles = await self.fetch_all_sources(full=github_pages)
+                
+                if not articles:
+                    print("\n⚠️ No articles fetched. Check your internet connection.")
+                    return False
+                
+                # Process
+                grouped = await self.process_articles(articles, dedup)
+                
+                if not grouped:
+                    print("\n📭 No new articles to send today.")
+                    save_source_state(SOURCE_STATE_PATH, self.source_state)
+                    return True
+                
+                # Output (GitHub Pages or Email)
+                if github_pages:
+                    success = await self.save_to_github_pages(grouped)
+                else:
+                    success = await self.send_digest(grouped, dedup)
+                
+                if success:
+                    save_source_state(SOURCE_STATE_PATH, self.source_state)
+                
+                print("\n" + "=" * 60)
+                print("🏁 Pipeline completed!")
+                print("=" * 60)
+                
+                return success
+                
         except Exception as e:
             print(f"\n❌ Error in pipeline: {e}")
             import traceback
             traceback.print_exc()
             return False
+        
+        finally:
+            # The shared Groq pool is bound to this run's event loop
+            await close_groq_client()
 
 
 def run_aggregator(github_pages: bool = False):
     """Synchronous wrapper for the aggregator."""
     aggregator = AINewsAggregator()
-    asyncio.run(aggregator.run(github_pages=github_pages))
+    # uvloop's C event loop when installed, the default asyncio loop otherwise
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop if uvloop else None) as runner:
+        runner.run(aggregator.run(github_pages=github_pages))
 
 
 def run_scheduled():
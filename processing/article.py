@@ -0,0 +1,29 @@
+"""
+Article
+Shared article record used across the processing pipeline.
+"""
+
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(slots=True)
+class Article:
+    """Represents a single news article."""
+    id: str
+    title: str
+    url: str
+    source: str
+    category: str
+    published: Optional[datetime]
+    summary: str
+    content: Optional[str] = None
+    author: Optional[str] = None
+    summary_es: Optional[str] = None
+
+
+def make_id(key: str) -> str:
+    """Stable article id for a source-specific key (64-bit BLAKE2b, hex)."""
+    return hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
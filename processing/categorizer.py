@@ -4,22 +4,11 @@ Classifies articles into predefined categories.
 """
 
 from typing import List, Dict
-from dataclasses import dataclass
 from collections import defaultdict
+from datetime import datetime
 
-
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: any
-    summary: str
-    content: str = None
-    author: str = None
+from processing.article import Article
+from processing.matcher import KeywordMatcher
 
 
 # Category definitions with keywords (priority = order of display)
@@ -76,31 +65,48 @@ EXCLUDED_CATEGORIES = [
 ]
 
 
+def _sort_key(article: Article) -> datetime:
+    """Publication date for sorting (handles None and mixed timezones)."""
+    if article.published is None:
+        return datetime.min
+    try:
+        # Convert to timestamp to avoid timezone issues
+        if hasattr(article.published, 'timestamp'):
+            return datetime.fromtimestamp(article.published.timestamp())
+        return article.published
+    except:
+        return datetime.min
+
+
 class Categorizer:
     """Categorizes articles based on content and source."""
     
     def __init__(self):
         self.categories = CATEGORIES
-    
-    def _score_category(self, article: Article, category_name: str) -> int:
-        """Score how well an article matches a category."""
-        category = self.categories[category_name]
-        score = 0
-        
-        # Check source match (high weight)
-        for source_pattern in category["sources"]:
-            if source_pattern.lower() in article.source.lower():
-                score += 100
-                break
+        self._priority_order = sorted(self.categories, key=lambda c: self.categories[c]["priority"])
         
-        # Check keyword matches in title and summary
-        text = f"{article.title} {article.summary}".lower()
-        
-        for keyword in category["keywords"]:
-            if keyword.lower() in text:
-                score += 10
-        
-        return score
+        # All categories' keywords / source patterns in one matcher each
+        self._keywords = {
+            name: frozenset(kw.lower() for kw in category["keywords"])
+            for name, category in self.categories.items()
+        }
+        self._sources = {
+            name: frozenset(src.lower() for src in category["sources"])
+            for name, category in self.categories.items()
+        }
+        self._keyword_matcher = KeywordMatcher(kw for kws in self._keywords.values() for kw in kws)
+        self._source_matcher = KeywordMatcher(src for srcs in self._sources.values() for src in srcs)
+    
+    def _score_categories(self, sources: frozenset, keywords: frozenset) -> Dict[str, int]:
+        """Score every category from the matched source patterns and keywords."""
+        return {
+            name: (
+                # Source match (high weight, once) + keyword matches in title and summary
+                (100 if sources & self._sources[name] else 0)
+                + 10 * len(keywords & self._keywords[name])
+            )
+            for name in self.categories
+        }
     
     def categorize_article(self, article: Article) -> str:
         """Assign the best category to an article."""
@@ -108,11 +114,13 @@ class Categorizer:
         if article.category and article.category in self.categories:
             return article.category
         
-        # Score each category
-        scores = {}
-        for category_name in self.categories:
-            scores[category_name] = self._score_category(article, category_name)
-        
+        return self._best_category(self._score_categories(
+            self._source_matcher.matches(article.source.lower()),
+            self._keyword_matcher.matches(f"{article.title} {article.summary}".lower())
+        ))
+    
+    def _best_category(self, scores: Dict[str, int]) -> str:
+        """Pick the category for a set of scores."""
         # Return highest scoring category (with priority tiebreaker)
         best_category = max(
             scores.keys(),
@@ -126,48 +134,37 @@ class Categorizer:
         return best_category
     
     def categorize_all(self, articles: List[Article]) -> List[Article]:
-        """Categorize all articles."""
-        for article in articles:
-            article.category = self.categorize_article(article)
+        """Categorize all articles (one matcher scan over the whole batch)."""
+        pending = [
+            article for article in articles
+            if not (article.category and article.category in self.categories)
+        ]
+        
+        source_matches = self._source_matcher.matches_many(
+            [article.source.lower() for article in pending]
+        )
+        keyword_matches = self._keyword_matcher.matches_many(
+            [f"{article.title} {article.summary}".lower() for article in pending]
+        )
+        
+        for article, sources, keywords in zip(pending, source_matches, keyword_matches):
+            article.category = self._best_category(self._score_categories(sources, keywords))
         return articles
     
     def group_by_category(self, articles: List[Article]) -> Dict[str, List[Article]]:
-        """Group articles by category, sorted by priority."""
-        # First categorize
-        articles = self.categorize_all(articles)
-        
+        """Group already-categorized articles by category, sorted by priority."""
         # Group (excluding excluded categories)
         groups = defaultdict(list)
         for article in articles:
             if article.category not in EXCLUDED_CATEGORIES:
                 groups[article.category].append(article)
         
-        # Sort each group by publication date (newest first, handle None and mixed timezones)
-        from datetime import datetime
-        def get_sort_key(article):
-            if article.published is None:
-                return datetime.min
-            try:
-                # Convert to timestamp to avoid timezone issues
-                if hasattr(article.published, 'timestamp'):
-                    return datetime.fromtimestamp(article.published.timestamp())
-                return article.published
-            except:
-                return datetime.min
-        
-        for category in groups:
-            groups[category].sort(key=get_sort_key, reverse=True)
-        
-        # Return ordered dict by category priority
-        ordered = {}
-        for category in sorted(
-            self.categories.keys(),
-            key=lambda c: self.categories[c]["priority"]
-        ):
-            if category in groups and category not in EXCLUDED_CATEGORIES:
-                ordered[category] = groups[category]
-        
-        return ordered
+        # Ordered by category priority; each group newest first
+        return {
+            category: sorted(groups[category], key=_sort_key, reverse=True)
+            for category in self._priority_order
+            if category in groups
+        }
 
 
 # Convenience functions
@@ -177,8 +174,9 @@ def categorize_articles(articles: List[Article]) -> List[Article]:
 
 
 def group_articles_by_category(articles: List[Article]) -> Dict[str, List[Article]]:
-    """Group articles by category."""
-    return Categorizer().group_by_category(articles)
+    """Categorize and group articles by category."""
+    categorizer = Categorizer()
+    return categorizer.group_by_category(categorizer.categorize_all(articles))
 
 
 if __name__ == "__main__":
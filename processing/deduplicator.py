@@ -5,24 +5,65 @@ Prevents duplicate articles from being sent using SQLite cache.
 
 import aiosqlite
 import hashlib
+import math
 import os
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Set
-from dataclasses import dataclass, asdict
 
+from processing.article import Article
 
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: datetime
-    summary: str
-    content: str = None
-    author: str = None
+
+# SQLite's default bound-parameter limit (SQLITE_MAX_VARIABLE_NUMBER)
+SQLITE_MAX_VARIABLES = 999
+
+
+class _KeepAlnumSpace(dict):
+    """str.translate table that drops every char not alphanumeric or whitespace.
+    
+    Entries are filled on first sight of a codepoint instead of precomputing
+    all 0x110000 of them.
+    """
+    
+    def __missing__(self, codepoint: int):
+        ch = chr(codepoint)
+        value = codepoint if ch.isalnum() or ch.isspace() else None
+        self[codepoint] = value
+        return value
+
+
+_KEEP_TABLE = _KeepAlnumSpace()
+
+
+@lru_cache(maxsize=4096)
+def _title_hash(title: str) -> str:
+    """Normalize (lowercase, drop punctuation, collapse spaces) and hash a title."""
+    normalized = ' '.join(title.lower().translate(_KEEP_TABLE).split())
+    # Identity bucketing only, no need for a cryptographic-strength digest
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives)."""
+    
+    def __init__(self, capacity: int = 200_000, error_rate: float = 1e-4):
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+    
+    def _positions(self, value: str):
+        # Kirsch-Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+    
+    def add(self, value: str):
+        for pos in self._positions(value):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, value: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(value))
 
 
 class Deduplicator:
@@ -33,6 +74,7 @@ class Deduplicator:
             os.path.dirname(__file__), "..", "data", "sent_articles.db"
         )
         self.conn = None
+        self.bloom = BloomFilter()
     
     async def __aenter__(self):
         await self._init_db()
@@ -47,6 +89,10 @@ class Deduplicator:
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
         self.conn = await aiosqlite.connect(self.db_path)
         
+        # WAL + NORMAL: a commit is a WAL append instead of a full fsync sequence
+        await self.conn.execute("PRAGMA journal_mode=WAL")
+        await self.conn.execute("PRAGMA synchronous=NORMAL")
+        
         await self.conn.execute("""
             CREATE TABLE IF NOT EXISTS sent_articles (
                 id TEXT PRIMARY KEY,
@@ -65,22 +111,26 @@ class Deduplicator:
         """)
         
         await self.conn.commit()
+        
+        # Warm the prescreen with everything already sent
+        async with self.conn.execute("SELECT url, title_hash FROM sent_articles") as cursor:
+            async for url, title_hash in cursor:
+                self.bloom.add(url)
+                self.bloom.add(title_hash)
     
     def _hash_title(self, title: str) -> str:
         """Create hash of normalized title for comparison."""
-        # Normalize: lowercase, remove punctuation, trim
-        normalized = ''.join(c.lower() for c in title if c.isalnum() or c.isspace())
-        normalized = ' '.join(normalized.split())
-        return hashlib.md5(normalized.encode()).hexdigest()
+        return _title_hash(title)
     
     async def is_duplicate(self, article: Article) -> bool:
         """Check if article has been sent before."""
         title_hash = self._hash_title(article.title)
         
-        # Check by URL or similar title
+        # Check by URL or similar title (UNION ALL: each branch probes its own index)
         cursor = await self.conn.execute("""
-            SELECT 1 FROM sent_articles 
-            WHERE url = ? OR title_hash = ?
+            SELECT 1 FROM sent_articles WHERE url = ?
+            UNION ALL
+            SELECT 1 FROM sent_articles WHERE title_hash = ?
             LIMIT 1
         """, (article.url, title_hash))
         
@@ -97,21 +147,65 @@ class Deduplicator:
                 VALUES (?, ?, ?, ?)
             """, (article.id, article.url, title_hash, datetime.now()))
             await self.conn.commit()
+            self.bloom.add(article.url)
+            self.bloom.add(title_hash)
         except Exception as e:
             print(f"[Dedup] Error marking article: {e}")
     
     async def mark_batch_as_sent(self, articles: List[Article]):
-        """Mark multiple articles as sent."""
-        for article in articles:
-            await self.mark_as_sent(article)
+        """Mark multiple articles as sent (one statement, one commit)."""
+        now = datetime.now()
+        rows = [
+            (article.id, article.url, self._hash_title(article.title), now)
+            for article in articles
+        ]
+        
+        try:
+            await self.conn.executemany("""
+                INSERT OR REPLACE INTO sent_articles (id, url, title_hash, sent_at)
+                VALUES (?, ?, ?, ?)
+            """, rows)
+            await self.conn.commit()
+        except Exception as e:
+            print(f"[Dedup] Error marking articles: {e}")
+            return
+        
+        for _, url, title_hash, _ in rows:
+            self.bloom.add(url)
+            self.bloom.add(title_hash)
+    
+    async def _select_existing(self, column: str, values: List[str]) -> Set[str]:
+        """Return which of values are already stored in column (chunked IN queries)."""
+        found = set()
+        unique_values = list(dict.fromkeys(values))
+        
+        for start in range(0, len(unique_values), SQLITE_MAX_VARIABLES):
+            chunk = unique_values[start:start + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            cursor = await self.conn.execute(
+                f"SELECT {column} FROM sent_articles WHERE {column} IN ({placeholders})",
+                chunk
+            )
+            found.update(row[0] for row in await cursor.fetchall())
+        
+        return found
     
     async def filter_duplicates(self, articles: List[Article]) -> List[Article]:
         """Filter out duplicate articles, keeping only new ones."""
-        unique = []
+        hashes = [self._hash_title(article.title) for article in articles]
+        
+        # Only Bloom hits can be duplicates; everything else skips SQLite
+        candidates = [
+            (article, title_hash) for article, title_hash in zip(articles, hashes)
+            if article.url in self.bloom or title_hash in self.bloom
+        ]
+        seen_urls = await self._select_existing("url", [a.url for a, _ in candidates])
+        seen_hashes = await self._select_existing("title_hash", [h for _, h in candidates])
         
-        for article in articles:
-            if not await self.is_duplicate(article):
-                unique.append(article)
+        unique = [
+            article for article, title_hash in zip(articles, hashes)
+            if article.url not in seen_urls and title_hash not in seen_hashes
+        ]
         
         print(f"[Dedup] Filtered {len(articles)} -> {len(unique)} unique articles")
         return unique
@@ -0,0 +1,36 @@
+"""
+Async Google Translate
+Minimal aiohttp client for the public Google Translate endpoint, so
+translations share one pooled session instead of a blocking request each.
+"""
+
+import aiohttp
+
+TRANSLATE_URL = "https://translate.googleapis.com/translate_a/single"
+
+
+def create_session() -> aiohttp.ClientSession:
+    """Session tuned for many small translation requests to one host."""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=15)
+    )
+
+
+async def translate(
+    session: aiohttp.ClientSession,
+    text: str,
+    src: str = "auto",
+    tgt: str = "es"
+) -> str:
+    """Translate text; raises on HTTP errors, "" if the response has no segments."""
+    params = {"client": "gtx", "sl": src, "tl": tgt, "dt": "t"}
+
+    # POST keeps long texts out of the URL
+    async with session.post(TRANSLATE_URL, params=params, data={"q": text}) as response:
+        response.raise_for_status()
+        payload = await response.json(content_type=None)
+
+    # [[["translated", "original", ...], ...], ...] - one entry per sentence
+    segments = payload[0] if isinstance(payload, list) and payload else None
+    return "".join(segment[0] for segment in segments or () if segment and segment[0])
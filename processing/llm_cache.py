@@ -0,0 +1,78 @@
+"""
+LLM Cache
+Remembers LLM and translator responses so repeated inputs skip the API.
+"""
+
+import aiosqlite
+import hashlib
+import time
+from typing import Optional
+
+
+class LLMCache:
+    """
+    Request-hash -> response table, stored next to sent_articles.
+
+    Keys are built with LLMCache.key(...) from whatever determines the
+    response, e.g. (model, prompt) for Groq or ("gtrans", text) for Google
+    Translate.
+    """
+
+    def __init__(self, conn: aiosqlite.Connection, ttl_hours: int = 72):
+        # Shares the Deduplicator's connection (same DB file, separate table)
+        self.conn = conn
+        self.ttl_seconds = ttl_hours * 3600
+        self.hits = 0
+
+    @staticmethod
+    def key(*parts: str) -> str:
+        """Hash the request parts into a cache key."""
+        return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+    async def init(self):
+        """Create the table and sweep entries older than the TTL."""
+        await self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                hash TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                ts INTEGER
+            )
+        """)
+
+        await self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_llm_cache_ts ON llm_cache(ts)
+        """)
+
+        # Superseded by llm_cache (keyed by content only, no TTL)
+        await self.conn.execute("DROP TABLE IF EXISTS summary_cache")
+
+        await self.conn.execute(
+            "DELETE FROM llm_cache WHERE ts < ?", (int(time.time()) - self.ttl_seconds,)
+        )
+        await self.conn.commit()
+        return self
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, if present and fresh."""
+        cursor = await self.conn.execute(
+            "SELECT response FROM llm_cache WHERE hash = ? AND ts >= ?",
+            (key, int(time.time()) - self.ttl_seconds)
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            return None
+
+        self.hits += 1
+        return row[0]
+
+    async def put(self, key: str, model: str, response: str):
+        """Store a response under key."""
+        try:
+            await self.conn.execute("""
+                INSERT OR REPLACE INTO llm_cache (hash, model, response, ts)
+                VALUES (?, ?, ?, ?)
+            """, (key, model, response, int(time.time())))
+            await self.conn.commit()
+        except Exception as e:
+            print(f"[LLMCache] Error storing response: {e}")
@@ -0,0 +1,82 @@
+"""
+Keyword Matcher
+Finds which of a fixed set of keywords occur in a text with a single regex scan.
+"""
+
+import re
+from bisect import bisect_right
+from typing import FrozenSet, Iterable, List
+
+
+# Joins texts for matches_many; keywords containing it are rejected
+_SEPARATOR = "\x1f"
+
+
+def _trie_regex(node: dict) -> str:
+    """Render a character trie as a regex that prefers the longest keyword."""
+    branches = [re.escape(ch) + _trie_regex(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    # A keyword ends here: longer continuations are optional (greedy, tried first)
+    return f"(?:{body})?" if "" in node else body
+
+
+class KeywordMatcher:
+    """
+    Substring matcher for a fixed keyword set.
+
+    matches(text) returns the same keywords as {kw for kw in keywords if kw in text},
+    but the keywords are compiled into one trie-shaped regex so the text is
+    scanned once instead of once per keyword.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords = frozenset(kw for kw in keywords if kw)
+        if any(_SEPARATOR in kw for kw in self.keywords):
+            raise ValueError("Keywords may not contain the \\x1f separator")
+
+        trie = {}
+        for keyword in self.keywords:
+            node = trie
+            for ch in keyword:
+                node = node.setdefault(ch, {})
+            node[""] = {}
+
+        # Zero-width lookahead so every start position is tried; it captures the
+        # longest keyword starting there, the shorter ones are its prefixes
+        self._pattern = re.compile(f"(?=({_trie_regex(trie)}))", re.DOTALL) if trie else None
+        self._prefixes = {
+            keyword: frozenset(
+                keyword[:i] for i in range(1, len(keyword) + 1) if keyword[:i] in self.keywords
+            )
+            for keyword in self.keywords
+        }
+
+    def matches(self, text: str) -> FrozenSet[str]:
+        """Return every keyword that occurs in text."""
+        if self._pattern is None:
+            return frozenset()
+
+        found = set()
+        for match in self._pattern.finditer(text):
+            found |= self._prefixes[match.group(1)]
+        return frozenset(found)
+
+    def matches_many(self, texts: List[str]) -> List[FrozenSet[str]]:
+        """matches() for each text, using one scan over all of them."""
+        if self._pattern is None or not texts:
+            return [frozenset() for _ in texts]
+
+        # Join on a separator no keyword contains, so matches can't straddle texts
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+
+        found = [set() for _ in texts]
+        for match in self._pattern.finditer(_SEPARATOR.join(texts)):
+            found[bisect_right(starts, match.start()) - 1] |= self._prefixes[match.group(1)]
+        return [frozenset(f) for f in found]
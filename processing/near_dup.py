@@ -0,0 +1,90 @@
+"""
+Near-Duplicate Clustering
+Groups texts whose word (or word n-gram) sets are nearly identical (Jaccard
+similarity).
+
+Uses datasketch's MinHash LSH when installed; otherwise compares the sets
+directly, which is exact and fast enough for a daily batch.
+"""
+
+import re
+from typing import FrozenSet, List, TypeVar
+
+try:
+    from datasketch import MinHash, MinHashLSH
+except ImportError:  # Optional dependency
+    MinHash = MinHashLSH = None
+
+
+T = TypeVar("T")
+
+# Unicode-aware, so accented Spanish words stay whole
+_RE_WORD = re.compile(r'\w+')
+
+
+def _tokens(text: str, shingle_size: int = 1) -> FrozenSet[str]:
+    """Lowercase alphanumeric words, or overlapping runs of shingle_size words."""
+    words = _RE_WORD.findall(text.lower())
+    if shingle_size <= 1 or not words:
+        return frozenset(words)
+
+    # A text shorter than one shingle is a single shingle
+    count = max(len(words) - shingle_size + 1, 1)
+    return frozenset(" ".join(words[i:i + shingle_size]) for i in range(count))
+
+
+def _jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b)
+
+
+def cluster_near_duplicates(
+    texts: List[str],
+    threshold: float = 0.85,
+    num_perm: int = 64,
+    shingle_size: int = 1
+) -> List[int]:
+    """
+    Cluster texts by word-set similarity.
+
+    Returns:
+        For each text, the index of its cluster representative (the first
+        text of the cluster; a text that starts a cluster maps to itself)
+    """
+    token_sets = [_tokens(text, shingle_size) for text in texts]
+    representative = []
+
+    if MinHashLSH is not None:
+        lsh = MinHashLSH(threshold=threshold, num_perm=num_perm)
+        for i, tokens in enumerate(token_sets):
+            if not tokens:
+                representative.append(i)
+                continue
+
+            signature = MinHash(num_perm=num_perm)
+            signature.update_batch([token.encode() for token in tokens])
+            hits = lsh.query(signature)
+            if hits:
+                representative.append(min(int(hit) for hit in hits))
+            else:
+                lsh.insert(str(i), signature)
+                representative.append(i)
+        return representative
+
+    leaders = []
+    for i, tokens in enumerate(token_sets):
+        match = next(
+            (j for j in leaders if tokens and _jaccard(tokens, token_sets[j]) >= threshold),
+            None
+        )
+        if match is None:
+            leaders.append(i)
+            representative.append(i)
+        else:
+            representative.append(match)
+    return representative
+
+
+def drop_near_duplicates(items: List[T], texts: List[str], **options) -> List[T]:
+    """Keep the first item of each near-duplicate cluster (texts[i] describes items[i])."""
+    representative = cluster_near_duplicates(texts, **options)
+    return [item for i, item in enumerate(items) if representative[i] == i]
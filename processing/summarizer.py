@@ -4,146 +4,451 @@ Uses Groq (free) for intelligent summaries + Google Translate for titles.
 """
 
 import asyncio
+import httpx
+import json
+import random
 import re
 import os
-from groq import Groq
-from deep_translator import GoogleTranslator
-from typing import List, Optional
-from dataclasses import dataclass
+import time
+from collections import OrderedDict
+from groq import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncGroq,
+    AuthenticationError,
+    InternalServerError,
+    PermissionDeniedError,
+    RateLimitError,
+)
+from typing import Dict, List, Optional
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except Exception:  # Optional dependency (or its encoding file is unavailable)
+    _ENCODING = None
+
+from processing import gtrans_async
+from processing.article import Article
+from processing.llm_cache import LLMCache
+from processing.near_dup import cluster_near_duplicates
+
+
+# Tags (img included) in one alternation, then whitespace: two passes total
+_RE_HTML = re.compile(r'<img[^>]*>|<[^>]+>', re.IGNORECASE)
+_RE_WS = re.compile(r'\s+')
+
+# Process-local translation memo (text -> translation), checked before the DB cache
+_TRANSLATION_MEMO: "OrderedDict[str, str]" = OrderedDict()
+_TRANSLATION_MEMO_SIZE = 2048
+
+# Fixed parts of the Groq prompt; only the title and content vary per article
+_PROMPT_HEAD = """Traduce el título al español y genera un resumen en español de 3-4 oraciones sobre esta noticia de tecnología/IA.
+El resumen debe ser claro, profesional y en español natural.
+
+Título: """
+_PROMPT_TAIL = """
+
+Responde SOLO con este formato, sin introducciones ni explicaciones:
+TÍTULO: <título en español>
+RESUMEN: <resumen en español>"""
+
+# Packed prompt for several articles per call (JSON in, JSON object out)
+_BULK_HEAD = """Para cada noticia de tecnología/IA de esta lista JSON, traduce el título al español y genera un resumen en español de 3-4 oraciones.
+Los resúmenes deben ser claros, profesionales y en español natural.
+
+Noticias: """
+_BULK_TAIL = """
+
+Responde SOLO con un objeto JSON con este formato, una entrada por noticia y con el mismo id:
+{"articles": [{"id": "<id>", "title_es": "<título en español>", "summary_es": "<resumen en español>"}]}"""
+
+# Section headers in the fused Groq response
+_RESPONSE_FIELDS = {"TÍTULO": "title", "TITULO": "title", "RESUMEN": "summary"}
+# A RESUMEN with content followed by a blank line: nothing useful comes after
+_RE_SUMMARY_DONE = re.compile(r'RESUMEN\W*:\s*\S.*?\n[ \t]*\n', re.IGNORECASE | re.DOTALL)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to max_tokens tokens (about 4 characters each without tiktoken)."""
+    if _ENCODING is None:
+        return text[:max_tokens * 4]
+    
+    tokens = _ENCODING.encode(text)
+    return _ENCODING.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+
+
+def _remember_translation(text: str, translated: str):
+    """Store a translation in the memo, evicting the least recently used."""
+    _TRANSLATION_MEMO[text] = translated
+    _TRANSLATION_MEMO.move_to_end(text)
+    if len(_TRANSLATION_MEMO) > _TRANSLATION_MEMO_SIZE:
+        _TRANSLATION_MEMO.popitem(last=False)
 
 
 def strip_html_tags(text: str) -> str:
     """Remove HTML tags from text."""
     if not text:
         return ""
-    text = re.sub(r'<img[^>]*>', '', text, flags=re.IGNORECASE)
-    text = re.sub(r'<[^>]+>', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: any
-    summary: str
-    content: str = None
-    author: str = None
-    summary_es: str = None
+    return _RE_WS.sub(' ', _RE_HTML.sub('', text)).strip()
+
+
+# Process-wide Groq client, so every Summarizer reuses one keep-alive pool
+_groq_client: Optional[AsyncGroq] = None
+
+
+def _shared_groq_client(api_key: str) -> AsyncGroq:
+    """Return the shared Groq client, creating it on first use."""
+    global _groq_client
+    if _groq_client is None:
+        # Native async client; retries are handled in Summarizer._request
+        _groq_client = AsyncGroq(
+            api_key=api_key,
+            max_retries=0,
+            http_client=httpx.AsyncClient(
+                limits=httpx.Limits(max_keepalive_connections=32, max_connections=64),
+                timeout=httpx.Timeout(30.0)
+            )
+        )
+    return _groq_client
+
+
+async def aclose():
+    """Close the shared Groq client; call before the event loop shuts down."""
+    global _groq_client
+    if _groq_client is not None:
+        await _groq_client.close()
+        _groq_client = None
+
+
+class CircuitOpen(Exception):
+    """Raised inside the summarizer while Groq calls are suspended."""
+
+
+class TokenBucket:
+    """Async token bucket: bursts up to capacity, refills capacity tokens per period."""
+    
+    def __init__(self, capacity: int, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self._updated = None
+    
+    async def acquire(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self._updated is not None:
+                self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
 
 
 class Summarizer:
     """Summarizes with Groq and translates titles with Google Translate."""
     
-    def __init__(self):
+    MODEL = "llama-3.1-8b-instant"
+    
+    # Articles in flight at once, and requests/min kept just under Groq's free tier (30)
+    CONCURRENCY = int(os.getenv("SUMMARIZER_CONCURRENCY", "8"))
+    REQUESTS_PER_MINUTE = int(os.getenv("SUMMARIZER_RPM", "28"))
+    
+    # Transient Groq failures are retried with exponential backoff + jitter;
+    # a Retry-After beyond STOP_THRESHOLD means the quota is gone, so give up
+    RETRYABLE_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+    MAX_ATTEMPTS = 6
+    MAX_BACKOFF = 30.0
+    STOP_THRESHOLD = 300.0
+    
+    # Circuit breaker: after BREAKER_FAILS consecutive 429s, a rejected key
+    # (401/403) or a Retry-After past STOP_THRESHOLD, skip Groq for
+    # BREAKER_COOLDOWN seconds and fall back to plain translation
+    BREAKER_FAILS = 5
+    BREAKER_COOLDOWN = 300.0
+    
+    # Articles packed into one Groq call by process_batch (1 disables packing)
+    BULK_SIZE = int(os.getenv("SUMMARIZER_BULK_SIZE", "5"))
+    
+    def __init__(self, cache: Optional[LLMCache] = None):
         self.groq_key = os.getenv("GROQ_API_KEY", "")
         self.groq_client = None
-        self.translator = GoogleTranslator(source='auto', target='es')
+        self.cache = cache
+        # Bounds every summarize_and_translate call, batched or not
+        self.semaphore = asyncio.Semaphore(self.CONCURRENCY)
+        # Shapes Groq calls to the quota up front instead of reacting to 429s
+        self.limiter = TokenBucket(self.REQUESTS_PER_MINUTE)
+        # Pooled aiohttp session for Google Translate, opened in __aenter__
+        self.session = None
+        self._breaker = {"open_until": 0.0, "fails": 0}
+        # Responses from packed calls, keyed like the LLM cache
+        self._prefetched: Dict[str, str] = {}
         
         if self.groq_key:
-            self.groq_client = Groq(api_key=self.groq_key)
+            self.groq_client = _shared_groq_client(self.groq_key)
             print("[Summarizer] Groq API configured (free tier)")
         else:
             print("[Summarizer] No Groq API key - using translation only")
     
-    def _translate_title(self, text: str) -> str:
-        """Translate title with Google Translate."""
+    async def __aenter__(self):
+        self.session = gtrans_async.create_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        # The Groq client is shared and outlives this instance (see aclose)
+        if self.session:
+            await self.session.close()
+    
+    async def _translate(self, text: str, limit: Optional[int] = None) -> str:
+        """Translate text with Google Translate, memoized in-process and in the cache."""
         if not text or not text.strip():
             return text
+        
+        clean_text = strip_html_tags(text)[:limit]
+        memoized = _TRANSLATION_MEMO.get(clean_text)
+        if memoized is not None:
+            _TRANSLATION_MEMO.move_to_end(clean_text)
+            return memoized
+        
+        key = LLMCache.key("gtrans", clean_text)
+        if self.cache:
+            cached = await self.cache.get(key)
+            if cached:
+                _remember_translation(clean_text, cached)
+                return cached
+        
         try:
-            clean_text = strip_html_tags(text)
-            return self.translator.translate(clean_text)
+            translated = await gtrans_async.translate(self.session, clean_text)
         except Exception as e:
             print(f"[Translator] Error: {e}")
             return text
+        
+        if not translated:
+            # Keep the original rather than blanking the title / summary
+            return text
+        
+        _remember_translation(clean_text, translated)
+        if self.cache:
+            await self.cache.put(key, "gtrans", translated)
+        return translated
+    
+    @staticmethod
+    def _build_prompt(title: str, content: str) -> str:
+        """Build the fused title + summary prompt (pure; its text is also the cache key)."""
+        content = truncate_tokens(strip_html_tags(content), 375)
+        return f"{_PROMPT_HEAD}{title}\nContenido: {content}{_PROMPT_TAIL}"
+    
+    @staticmethod
+    def _parse_response(text: str) -> tuple:
+        """Split a TÍTULO:/RESUMEN: response into (title_es, summary_es)."""
+        parts = {"title": [], "summary": []}
+        state = None
+        
+        # Single pass: a known "HEADER:" switches section, other lines continue it
+        for line in text.splitlines():
+            head, sep, rest = line.partition(":")
+            field = _RESPONSE_FIELDS.get(head.strip(" *#").upper()) if sep else None
+            if field:
+                state = field
+                line = rest
+            line = line.strip(" *")
+            if state and line:
+                parts[state].append(line)
+        
+        return " ".join(parts["title"]) or None, " ".join(parts["summary"]) or None
     
-    def _summarize_with_groq(self, title: str, content: str) -> Optional[str]:
-        """Use Groq to generate Spanish summary."""
-        if not self.groq_client:
+    async def _summarize_with_groq(self, prompt: str) -> Optional[str]:
+        """Use Groq to generate the Spanish title + summary response."""
+        if not self.groq_client or self._breaker_open():
             return None
         
         try:
-            content = strip_html_tags(content)[:1500]
-            
-            prompt = f"""Genera un resumen en español de 3-4 oraciones sobre esta noticia de tecnología/IA.
-El resumen debe ser claro, profesional y en español natural.
-
-Título: {title}
-Contenido: {content}
-
-Responde SOLO con el resumen en español, sin introducciones ni explicaciones."""
-
-            response = self.groq_client.chat.completions.create(
-                model="llama-3.1-8b-instant",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=300,
-                temperature=0.5
-            )
-            
-            summary = response.choices[0].message.content.strip()
-            
-            # Clean up if it starts with common prefixes
-            prefixes = ["Resumen:", "Aquí está", "El resumen:", "Summary:"]
-            for prefix in prefixes:
-                if summary.lower().startswith(prefix.lower()):
-                    summary = summary[len(prefix):].strip()
-            
-            return summary if summary else None
+            text = (await self._request(prompt, stream=True)).strip()
+            if self._parse_response(text)[1] is None:
+                # Streamed text lacks a RESUMEN; let a full response decide
+                text = (await self._request(prompt, stream=False)).strip()
+            return text if text else None
             
+        except CircuitOpen:
+            return None
         except Exception as e:
             print(f"[Groq] Error: {e}")
             return None
     
-    def _translate_summary(self, text: str) -> str:
-        """Fallback: translate summary with Google Translate."""
-        if not text or not text.strip():
-            return text
+    async def _summarize_bulk(self, batch: List[Article]) -> Dict[str, str]:
+        """Summarize several articles in one call; returns cache key -> fused response."""
+        if not self.groq_client or self._breaker_open():
+            return {}
+        
+        # Short positional ids: cheaper than article ids and hard to garble
+        items, keys = [], {}
+        for i, article in enumerate(batch, 1):
+            content = self._article_content(article)
+            items.append({"id": str(i), "title": article.title, "content": truncate_tokens(strip_html_tags(content), 375)})
+            keys[str(i)] = LLMCache.key(self.MODEL, self._build_prompt(article.title, content))
+        prompt = f"{_BULK_HEAD}{json.dumps(items, ensure_ascii=False)}{_BULK_TAIL}"
+        
         try:
-            clean_text = strip_html_tags(text)[:1000]
-            return self.translator.translate(clean_text)
+            text = await self._request(
+                prompt,
+                stream=False,
+                max_tokens=400 * len(batch),
+                response_format={"type": "json_object"}
+            )
+            entries = json.loads(text).get("articles")
+        except CircuitOpen:
+            return {}
         except Exception as e:
-            print(f"[Translator] Error: {e}")
-            return text
+            print(f"[Groq] Bulk error, falling back to per-article calls: {e}")
+            return {}
+        
+        # Stored in the single-article format so the cache and parser are shared
+        responses = {}
+        for entry in entries if isinstance(entries, list) else []:
+            if not isinstance(entry, dict) or str(entry.get("id")) not in keys:
+                continue
+            title_es, summary_es = entry.get("title_es"), entry.get("summary_es")
+            if isinstance(summary_es, str) and summary_es.strip():
+                title_line = title_es.strip() if isinstance(title_es, str) else ""
+                responses[keys[str(entry["id"])]] = f"TÍTULO: {title_line}\nRESUMEN: {summary_es.strip()}"
+        return responses
+    
+    async def _prefetch_bulk(self, articles: List[Article]):
+        """Fill self._prefetched for uncached articles using packed calls."""
+        # Only probing: the per-article pass repeats (and counts) these lookups
+        hits = self.cache.hits if self.cache else 0
+        pending = []
+        for article in articles:
+            key = LLMCache.key(self.MODEL, self._build_prompt(article.title, self._article_content(article)))
+            if not (self.cache and await self.cache.get(key)):
+                pending.append(article)
+        if self.cache:
+            self.cache.hits = hits
+        if len(pending) < 2:
+            return
+        
+        batches = [pending[i:i + self.BULK_SIZE] for i in range(0, len(pending), self.BULK_SIZE)]
+        for responses in await asyncio.gather(*(self._summarize_bulk(b) for b in batches)):
+            self._prefetched.update(responses)
+        print(f"[Groq] {len(self._prefetched)}/{len(pending)} articles summarized in {len(batches)} packed calls")
+    
+    async def _request(self, prompt: str, stream: bool, max_tokens: int = 400, **options) -> str:
+        """One chat completion with rate limiting and retries; returns the text."""
+        for attempt in range(self.MAX_ATTEMPTS):
+            # Every attempt, retries included, draws from the rate limiter
+            await self.limiter.acquire()
+            if self._breaker_open():
+                raise CircuitOpen()
+            try:
+                response = await self.groq_client.chat.completions.create(
+                    model=self.MODEL,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=max_tokens,
+                    temperature=0.5,
+                    stream=stream,
+                    **options
+                )
+                if stream:
+                    text = await self._read_stream(response)
+                else:
+                    text = response.choices[0].message.content or ""
+                self._breaker["fails"] = 0
+                return text
+            except (AuthenticationError, PermissionDeniedError):
+                self._open_breaker("API key rejected")
+                raise CircuitOpen()
+            except self.RETRYABLE_ERRORS as e:
+                delay = self._retry_delay(e, attempt)
+                if isinstance(e, RateLimitError):
+                    self._breaker["fails"] += 1
+                    if delay > self.STOP_THRESHOLD or self._breaker["fails"] >= self.BREAKER_FAILS:
+                        self._open_breaker("rate limit exhausted")
+                        raise CircuitOpen()
+                if attempt == self.MAX_ATTEMPTS - 1 or delay > self.STOP_THRESHOLD:
+                    raise
+                print(f"[Groq] {type(e).__name__}, retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    @staticmethod
+    async def _read_stream(stream) -> str:
+        """Collect a streamed response, stopping once the RESUMEN section is complete."""
+        pieces = []
+        try:
+            async for chunk in stream:
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                piece = chunk.choices[0].delta.content
+                pieces.append(piece)
+                # Anything after the summary's closing blank line is wasted tokens
+                if "\n" in piece:
+                    done = _RE_SUMMARY_DONE.search("".join(pieces))
+                    if done:
+                        return done.string[:done.end()]
+        finally:
+            await stream.close()
+        return "".join(pieces)
+    
+    def _breaker_open(self) -> bool:
+        return time.monotonic() < self._breaker["open_until"]
+    
+    def _open_breaker(self, reason: str):
+        if not self._breaker_open():
+            print(f"[Groq] {reason}; skipping Groq for {self.BREAKER_COOLDOWN:.0f}s")
+        self._breaker["open_until"] = time.monotonic() + self.BREAKER_COOLDOWN
+        self._breaker["fails"] = 0
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Seconds to wait before retrying: Retry-After if given, else jittered backoff."""
+        response = getattr(error, "response", None)
+        retry_after = response.headers.get("retry-after") if response is not None else None
+        try:
+            return float(retry_after)
+        except (TypeError, ValueError):
+            return min(2 ** attempt, self.MAX_BACKOFF) * (1 + random.uniform(0, 0.5))
     
     async def summarize_and_translate(self, article: Article) -> Article:
         """Summarize and translate article to Spanish."""
-        loop = asyncio.get_event_loop()
+        async with self.semaphore:
+            return await self._summarize_and_translate(article)
+    
+    @staticmethod
+    def _article_content(article: Article) -> str:
+        return article.content or article.summary or article.title
+    
+    async def _summarize_and_translate(self, article: Article) -> Article:
+        content = self._article_content(article)
         
-        content = article.content or article.summary or article.title
+        # One Groq call returns both the Spanish title and summary
+        # (reusing an identical earlier request)
+        if self.groq_client:
+            prompt = self._build_prompt(article.title, content)
+            key = LLMCache.key(self.MODEL, prompt)
+            
+            response = await self.cache.get(key) if self.cache else None
+            if not response:
+                response = self._prefetched.pop(key, None) or await self._summarize_with_groq(prompt)
+                if response and self.cache:
+                    await self.cache.put(key, self.MODEL, response)
+            
+            title_es, summary_es = self._parse_response(response) if response else (None, None)
+            if summary_es:
+                article.title = title_es or await self._translate(article.title)
+                article.summary_es = summary_es
+                return article
+            if response:
+                print("[Groq] Unexpected response format, falling back to translator")
         
-        # Translate title with Google Translate
+        # Fallback: Google Translate for both title and summary
         try:
-            article.title = await loop.run_in_executor(
-                None, self._translate_title, article.title
-            )
+            article.title = await self._translate(article.title)
         except Exception as e:
             print(f"[Translator] Title error: {e}")
         
-        # Generate summary with Groq
-        if self.groq_client:
-            try:
-                summary = await loop.run_in_executor(
-                    None, 
-                    self._summarize_with_groq, 
-                    article.title, 
-                    content
-                )
-                if summary:
-                    article.summary_es = summary
-                    return article
-            except Exception as e:
-                print(f"[Groq] Fallback to translator: {e}")
-        
-        # Fallback to simple translation
         try:
-            article.summary_es = await loop.run_in_executor(
-                None, self._translate_summary, content
-            )
+            article.summary_es = await self._translate(content, limit=1000)
         except Exception as e:
             print(f"[Translator] Error: {e}")
             article.summary_es = strip_html_tags(article.summary)
@@ -151,21 +456,28 @@ Responde SOLO con el resumen en español, sin introducciones ni explicaciones.""
         return article
     
     async def process_batch(self, articles: List[Article], max_articles: int = 25) -> List[Article]:
-        """Process articles with delays to respect rate limits."""
+        """Process articles concurrently (bounded by the semaphore and rate limiter)."""
         processed = []
         articles = articles[:max_articles]
         
-        for i, article in enumerate(articles):
-            title_preview = (article.title or "No title")[:40]
-            print(f"[Summarizer] {i+1}/{len(articles)}: {title_preview}...")
+        # Packed calls first; whatever they miss goes through the per-article path
+        if self.groq_client and self.BULK_SIZE > 1:
+            await self._prefetch_bulk(articles)
+        
+        tasks = [asyncio.create_task(self.summarize_and_translate(article)) for article in articles]
+        for future in asyncio.as_completed(tasks):
+            try:
+                result = await future
+            except Exception as e:
+                print(f"[Summarizer] Error: {e}")
+                continue
             
-            result = await self.summarize_and_translate(article)
             processed.append(result)
-            
-            # Delay between Groq API calls (rate limit: 30 req/min)
-            if i < len(articles) - 1:
-                await asyncio.sleep(2)
+            title_preview = (result.title or "No title")[:40]
+            print(f"[Summarizer] {len(processed)}/{len(articles)}: {title_preview}...")
         
+        if self.cache and self.cache.hits:
+            print(f"[Summarizer] {self.cache.hits} responses reused from cache")
         print(f"[Summarizer] Processed {len(processed)} articles")
         return processed
     
@@ -173,13 +485,32 @@ Responde SOLO con el resumen en español, sin introducciones ni explicaciones.""
         """Summarize and translate all articles."""
         if not articles:
             return articles
-        return await self.process_batch(articles)
+
+        # Near-identical stories (e.g. the same announcement from two feeds)
+        # cost one LLM call; the rest copy the representative's output
+        texts = [strip_html_tags(f"{a.title} {a.summary}") for a in articles]
+        representative = cluster_near_duplicates(texts)
+        unique = [a for i, a in enumerate(articles) if representative[i] == i]
+        if len(unique) < len(articles):
+            print(f"[Summarizer] {len(articles) - len(unique)} near-duplicates share a summary")
+
+        done = {id(a) for a in await self.process_batch(unique)}
+        results = []
+        for i, article in enumerate(articles):
+            rep = articles[representative[i]]
+            if id(rep) not in done:
+                continue
+            if rep is not article:
+                article.title = rep.title
+                article.summary_es = rep.summary_es
+            results.append(article)
+        return results
 
 
 async def summarize_articles(articles: List[Article]) -> List[Article]:
     """Summarize and translate all articles."""
-    summarizer = Summarizer()
-    return await summarizer.summarize_all(articles)
+    async with Summarizer() as summarizer:
+        return await summarizer.summarize_all(articles)
 
 
 if __name__ == "__main__":
@@ -198,8 +529,9 @@ if __name__ == "__main__":
     )
     
     async def test():
-        summarizer = Summarizer()
-        result = await summarizer.summarize_and_translate(test_article)
+        async with Summarizer() as summarizer:
+            result = await summarizer.summarize_and_translate(test_article)
+        await aclose()
         print(f"Title: {result.title}")
         print(f"Summary: {result.summary_es}")
     
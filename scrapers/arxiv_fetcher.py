@@ -5,26 +5,14 @@ Fetches recent AI/ML papers from arXiv.
 
 import aiohttp
 import asyncio
-import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
 from typing import List, Optional
-from dataclasses import dataclass
-import hashlib
 import re
+from lxml import etree
 
-
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: datetime
-    summary: str
-    content: Optional[str] = None
-    author: Optional[str] = None
+from processing.article import Article, make_id
+from scrapers.dates import parse_iso
+from scrapers.exact_dedup import ExactDedup
 
 
 class ArxivFetcher:
@@ -32,63 +20,80 @@ class ArxivFetcher:
     
     BASE_URL = "http://export.arxiv.org/api/query"
     
-    def __init__(self, max_results: int = 20, categories: List[str] = None):
+    NAMESPACES = {
+        'atom': 'http://www.w3.org/2005/Atom',
+        'arxiv': 'http://arxiv.org/schemas/atom'
+    }
+    
+    ENTRY_TAG = '{http://www.w3.org/2005/Atom}entry'
+    _WS_RE = re.compile(r'\s+')
+    CHUNK_SIZE = 16384
+    
+    # Compiled once; plain str results so values don't pin the parsed tree
+    _XP_ID = etree.XPath('string(atom:id)', namespaces=NAMESPACES)
+    _XP_TITLE = etree.XPath('atom:title/text()', namespaces=NAMESPACES, smart_strings=False)
+    _XP_SUMMARY = etree.XPath('atom:summary/text()', namespaces=NAMESPACES, smart_strings=False)
+    _XP_PUBLISHED = etree.XPath('string(atom:published)', namespaces=NAMESPACES)
+    _XP_AUTHORS = etree.XPath('atom:author/atom:name/text()', namespaces=NAMESPACES, smart_strings=False)
+    
+    # Sent per request too, so they apply on a shared session
+    TIMEOUT = aiohttp.ClientTimeout(total=60)
+    HEADERS = {
+        "User-Agent": "AI-News-Aggregator/1.0"
+    }
+    
+    def __init__(self, max_results: int = 20, categories: List[str] = None,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 exact_dedup: Optional[ExactDedup] = None):
         self.max_results = max_results
         self.categories = categories or ["cs.AI", "cs.LG", "cs.CL"]
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Shared run-wide session if given; otherwise one is opened in __aenter__
+        self.session = session
+        self._owns_session = session is None
+        # Shared across fetchers so cross-source repeats are dropped too
+        self.exact_dedup = exact_dedup or ExactDedup()
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=60),
-            headers={
-                "User-Agent": "AI-News-Aggregator/1.0"
-            }
-        )
+        if self._owns_session:
+            self.session = aiohttp.ClientSession(timeout=self.TIMEOUT, headers=self.HEADERS)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_session and self.session:
             await self.session.close()
     
     def _generate_id(self, arxiv_id: str) -> str:
         """Generate unique ID from arXiv ID."""
-        return hashlib.md5(arxiv_id.encode()).hexdigest()
+        return make_id(arxiv_id)
     
     def _clean_text(self, text: str) -> str:
         """Clean text by removing extra whitespace."""
-        return re.sub(r'\s+', ' ', text).strip()
+        return self._WS_RE.sub(' ', text).strip()
+    
+    def _parse_published(self, entry: etree._Element) -> datetime:
+        """Published date of an entry (now if missing); raises ValueError if malformed."""
+        published_text = self._XP_PUBLISHED(entry)
+        return parse_iso(published_text) if published_text else datetime.now()
     
-    def _parse_entry(self, entry: ET.Element, ns: dict) -> Optional[Article]:
-        """Parse a single arXiv entry."""
+    def _parse_entry(self, entry: etree._Element, published: datetime) -> Optional[Article]:
+        """Parse a single arXiv entry whose date was already read."""
         try:
             # Extract arXiv ID
-            id_elem = entry.find('atom:id', ns)
-            if id_elem is None:
+            arxiv_url = self._XP_ID(entry)
+            if not arxiv_url:
                 return None
-            arxiv_url = id_elem.text
             arxiv_id = arxiv_url.split('/abs/')[-1] if '/abs/' in arxiv_url else arxiv_url
             
             # Title
-            title_elem = entry.find('atom:title', ns)
-            title = self._clean_text(title_elem.text) if title_elem is not None else "No Title"
+            title = self._XP_TITLE(entry)
+            title = self._clean_text(title[0]) if title else "No Title"
             
             # Summary/Abstract
-            summary_elem = entry.find('atom:summary', ns)
-            summary = self._clean_text(summary_elem.text) if summary_elem is not None else ""
-            
-            # Published date
-            published_elem = entry.find('atom:published', ns)
-            if published_elem is not None:
-                published = datetime.fromisoformat(published_elem.text.replace('Z', '+00:00'))
-            else:
-                published = datetime.now()
+            summary = self._XP_SUMMARY(entry)
+            summary = self._clean_text(summary[0]) if summary else ""
             
             # Authors
-            authors = []
-            for author in entry.findall('atom:author', ns):
-                name_elem = author.find('atom:name', ns)
-                if name_elem is not None:
-                    authors.append(name_elem.text)
+            authors = self._XP_AUTHORS(entry)
             author_str = ", ".join(authors[:3])  # First 3 authors
             if len(authors) > 3:
                 author_str += f" et al. ({len(authors)} authors)"
@@ -127,33 +132,50 @@ class ArxivFetcher:
             "sortOrder": "descending"
         }
         
+        cutoff_time = datetime.now() - timedelta(hours=lookback_hours)
+        
         try:
-            async with self.session.get(self.BASE_URL, params=params) as response:
+            # Entries are parsed as bytes arrive, then freed
+            parser = etree.XMLPullParser(events=('end',), tag=self.ENTRY_TAG)
+            
+            async with self.session.get(
+                self.BASE_URL, params=params, headers=self.HEADERS, timeout=self.TIMEOUT
+            ) as response:
                 if response.status != 200:
                     print(f"[arXiv] Error: HTTP {response.status}")
                     return articles
                 
-                content = await response.text()
-            
-            # Parse XML response
-            root = ET.fromstring(content)
-            
-            # Define namespace
-            ns = {
-                'atom': 'http://www.w3.org/2005/Atom',
-                'arxiv': 'http://arxiv.org/schemas/atom'
-            }
-            
-            # Process entries
-            cutoff_time = datetime.now() - timedelta(hours=lookback_hours)
-            
-            for entry in root.findall('atom:entry', ns):
-                article = self._parse_entry(entry, ns)
-                
-                if article:
-                    # Check if recent enough (arXiv dates are UTC)
-                    if article.published.replace(tzinfo=None) >= cutoff_time:
-                        articles.append(article)
+                reached_cutoff = False
+                async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                    parser.feed(chunk)
+                    for _, entry in parser.read_events():
+                        try:
+                            published = self._parse_published(entry)
+                        except ValueError as e:
+                            print(f"[arXiv] Error parsing entry date: {e}")
+                            published = None
+                        
+                        # Newest first, so the first entry past the cutoff ends
+                        # the feed (arXiv dates are UTC)
+                        if published and published.replace(tzinfo=None) < cutoff_time:
+                            reached_cutoff = True
+                            break
+                        
+                        article = self._parse_entry(entry, published) if published else None
+                        
+                        # Drop the finished entry and the siblings before it
+                        entry.clear()
+                        while entry.getprevious() is not None:
+                            del entry.getparent()[0]
+                        
+                        if article:
+                            articles.append(article)
+                    
+                    # Stop reading the response too
+                    if reached_cutoff:
+                        break
+                else:
+                    parser.close()
             
             print(f"[arXiv] Found {len(articles)} recent papers")
             
@@ -162,7 +184,7 @@ class ArxivFetcher:
         except Exception as e:
             print(f"[arXiv] Error: {e}")
         
-        return articles
+        return self.exact_dedup.filter(articles)
 
 
 # Convenience function
@@ -0,0 +1,45 @@
+"""
+Date Parsing
+Fast paths for the two formats feeds and APIs actually use (ISO 8601 and
+RFC 822), with dateutil only as a last resort.
+"""
+
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+try:
+    from dateutil.parser import parse as dateutil_parse
+except ImportError:  # Optional dependency
+    dateutil_parse = None
+
+
+def parse_iso(text: str) -> datetime:
+    """Parse an ISO 8601 timestamp, including a trailing 'Z' (UTC)."""
+    if text.endswith('Z'):
+        text = text[:-1] + '+00:00'
+    return datetime.fromisoformat(text)
+
+
+def parse_date(text: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO 8601 or RFC 822 date string; None if unparseable."""
+    if not text:
+        return None
+    text = text.strip()
+
+    try:
+        return parse_iso(text)
+    except ValueError:
+        pass
+
+    try:
+        return parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        pass
+
+    if dateutil_parse is not None:
+        try:
+            return dateutil_parse(text)
+        except (ValueError, OverflowError):
+            pass
+    return None
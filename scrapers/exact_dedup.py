@@ -0,0 +1,37 @@
+"""
+Exact Dedup
+Drops articles whose title + summary exactly repeat one already fetched,
+e.g. the same arXiv paper surfaced by both an RSS feed and HF Papers.
+"""
+
+import hashlib
+from typing import List, Set
+
+from processing.article import Article
+
+
+class ExactDedup:
+    """Fingerprint set shared by all fetchers of a run."""
+
+    # Only the start of the summary is fingerprinted
+    SUMMARY_CHARS = 4000
+
+    def __init__(self):
+        self.seen: Set[bytes] = set()
+
+    def _fingerprint(self, article: Article) -> bytes:
+        title = " ".join(article.title.lower().split())
+        summary = " ".join((article.summary or "")[:self.SUMMARY_CHARS].lower().split())
+        return hashlib.sha1(f"{title}\n{summary}".encode()).digest()[:16]
+
+    def add(self, article: Article) -> bool:
+        """Record the article; False if an identical one was already seen."""
+        key = self._fingerprint(article)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def filter(self, articles: List[Article]) -> List[Article]:
+        """Keep only articles not seen before (in this call or earlier ones)."""
+        return [article for article in articles if self.add(article)]
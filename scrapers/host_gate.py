@@ -0,0 +1,82 @@
+"""
+Host Gate
+Per-host politeness for concurrent fetchers: concurrency cap, minimum spacing
+between requests and HTTP 429 Retry-After back-off.
+"""
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class HostRateLimited(Exception):
+    """Raised when a host asked us (via 429) to stay away for a while."""
+
+
+class _HostState:
+    """Semaphore and timing for one host."""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.next_slot = 0.0
+        self.not_before = 0.0
+
+
+class HostGate:
+    """Serializes requests per host while letting different hosts run in parallel."""
+
+    # Back-off used when a 429 carries no usable Retry-After
+    DEFAULT_RETRY_AFTER = 60.0
+
+    def __init__(self, per_host_concurrency: int = 2, min_interval: float = 1.0):
+        self.per_host_concurrency = per_host_concurrency
+        self.min_interval = min_interval
+        self._hosts: Dict[str, _HostState] = {}
+
+    def _state(self, url: str) -> _HostState:
+        host = urlparse(url).netloc.lower()
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self.per_host_concurrency)
+        return state
+
+    @asynccontextmanager
+    async def request(self, url: str):
+        """Hold a slot for url's host for the duration of one request."""
+        state = self._state(url)
+
+        async with state.semaphore:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            if now < state.not_before:
+                raise HostRateLimited(
+                    f"{urlparse(url).netloc} rate-limited for {state.not_before - now:.0f}s more"
+                )
+
+            slot = max(now, state.next_slot)
+            state.next_slot = slot + self.min_interval
+            if slot > now:
+                await asyncio.sleep(slot - now)
+
+            yield
+
+    def back_off(self, url: str, retry_after: Optional[str] = None) -> float:
+        """Record a 429 for url's host; returns the back-off in seconds."""
+        delay = self.DEFAULT_RETRY_AFTER
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    when = parsedate_to_datetime(retry_after)
+                    delay = (when - datetime.now(timezone.utc)).total_seconds()
+                except (TypeError, ValueError):
+                    pass
+        delay = max(delay, 0.0)
+
+        state = self._state(url)
+        state.not_before = max(state.not_before, asyncio.get_running_loop().time() + delay)
+        return delay
@@ -7,22 +7,15 @@ import aiohttp
 import asyncio
 from datetime import datetime, timedelta
 from typing import List, Optional
-from dataclasses import dataclass
-import hashlib
 
+try:
+    from orjson import loads as json_loads
+except ImportError:  # Optional dependency; stdlib json also accepts bytes
+    from json import loads as json_loads
 
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: datetime
-    summary: str
-    content: Optional[str] = None
-    author: Optional[str] = None
+from processing.article import Article, make_id
+from scrapers.dates import parse_iso
+from scrapers.exact_dedup import ExactDedup
 
 
 class HuggingFaceFetcher:
@@ -31,37 +24,46 @@ class HuggingFaceFetcher:
     PAPERS_API = "https://huggingface.co/api/daily_papers"
     MODELS_API = "https://huggingface.co/api/models"
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
+    # Sent per request too, so they apply on a shared session
+    TIMEOUT = aiohttp.ClientTimeout(total=30)
+    HEADERS = {
+        "User-Agent": "AI-News-Aggregator/1.0"
+    }
+    
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None,
+                 exact_dedup: Optional[ExactDedup] = None):
+        # Shared run-wide session if given; otherwise one is opened in __aenter__
+        self.session = session
+        self._owns_session = session is None
+        # Shared across fetchers so cross-source repeats are dropped too
+        self.exact_dedup = exact_dedup or ExactDedup()
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                "User-Agent": "AI-News-Aggregator/1.0"
-            }
-        )
+        if self._owns_session:
+            self.session = aiohttp.ClientSession(timeout=self.TIMEOUT, headers=self.HEADERS)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_session and self.session:
             await self.session.close()
     
     def _generate_id(self, url: str) -> str:
         """Generate unique ID from URL."""
-        return hashlib.md5(url.encode()).hexdigest()
+        return make_id(url)
     
     async def fetch_daily_papers(self, limit: int = 15) -> List[Article]:
         """Fetch today's trending papers from HF Daily Papers."""
         articles = []
         
         try:
-            async with self.session.get(self.PAPERS_API) as response:
+            async with self.session.get(
+                self.PAPERS_API, headers=self.HEADERS, timeout=self.TIMEOUT
+            ) as response:
                 if response.status != 200:
                     print(f"[HF Papers] Error: HTTP {response.status}")
                     return articles
                 
-                papers = await response.json()
+                papers = json_loads(await response.read())
             
             for paper in papers[:limit]:
                 try:
@@ -81,7 +83,7 @@ class HuggingFaceFetcher:
                     # Published date
                     pub_date_str = paper.get('publishedAt', '')
                     if pub_date_str:
-                        published = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
+                        published = parse_iso(pub_date_str)
                     else:
                         published = datetime.now()
                     
@@ -125,12 +127,14 @@ class HuggingFaceFetcher:
         }
         
         try:
-            async with self.session.get(self.MODELS_API, params=params) as response:
+            async with self.session.get(
+                self.MODELS_API, params=params, headers=self.HEADERS, timeout=self.TIMEOUT
+            ) as response:
                 if response.status != 200:
                     print(f"[HF Models] Error: HTTP {response.status}")
                     return articles
                 
-                models = await response.json()
+                models = json_loads(await response.read())
             
             # Filter for models with significant downloads (popular)
             cutoff = datetime.now() - timedelta(hours=48)
@@ -147,7 +151,7 @@ class HuggingFaceFetcher:
                     # Created date
                     created_str = model.get('createdAt', '')
                     if created_str:
-                        created = datetime.fromisoformat(created_str.replace('Z', '+00:00'))
+                        created = parse_iso(created_str)
                         if created.replace(tzinfo=None) < cutoff:
                             continue
                     else:
@@ -204,7 +208,7 @@ class HuggingFaceFetcher:
         if isinstance(models, list):
             articles.extend(models)
         
-        return articles
+        return self.exact_dedup.filter(articles)
 
 
 # Convenience function
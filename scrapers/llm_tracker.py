@@ -5,27 +5,38 @@ Tracks version updates and releases from major LLM providers.
 
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
 from datetime import datetime
-from typing import List, Dict, Optional
-from dataclasses import dataclass
+from typing import List, Dict, Optional, Tuple
 import hashlib
 import json
 import os
+import sys
+import time
+from collections import OrderedDict
+from lxml import etree, html as lhtml
 
+from processing.article import Article, make_id
+from processing.matcher import KeywordMatcher
+from scrapers.exact_dedup import ExactDedup
 
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: datetime
-    summary: str
-    content: Optional[str] = None
-    author: Optional[str] = None
+
+# Changelog entry patterns, most specific first; XPath equivalents of the CSS
+# selectors article, .changelog-entry, .release, [class*="changelog"],
+# [class*="release"], h2, h3 (compiled once, no cssselect needed)
+_HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+_ENTRY_XPATHS = [
+    etree.XPath(expr) for expr in (
+        "//article",
+        f"//*[{_HAS_CLASS.format('changelog-entry')}]",
+        f"//*[{_HAS_CLASS.format('release')}]",
+        "//*[contains(@class, 'changelog')]",
+        "//*[contains(@class, 'release')]",
+        "//h2",
+        "//h3",
+    )
+]
+# Visible text only, like BeautifulSoup's get_text()
+_TEXT_XPATH = etree.XPath(".//text()[not(ancestor::script or ancestor::style)]", smart_strings=False)
 
 
 # LLM Providers and their changelog/model pages
@@ -74,68 +85,152 @@ LLM_SOURCES = [
     },
 ]
 
+# Per provider, one matcher for "mentions a model, 'update' or 'release'"
+# (lowercased once; _check_provider matches against lowercased text)
+for _source in LLM_SOURCES:
+    _source["_matcher"] = KeywordMatcher(
+        [model.lower() for model in _source["models"]] + ["update", "release"]
+    )
+
 
 class LLMTracker:
     """Tracks LLM model updates and releases."""
     
     CACHE_FILE = os.path.join(os.path.dirname(__file__), "..", "data", "llm_versions.json")
+    # Most recently seen entries kept in the cache file
+    MAX_CACHE_ENTRIES = 5000
+    
+    # Changelog pages fetched at once
+    PROVIDER_CONCURRENCY = 4
+    
+    # (mtime_ns, entries, pages) of the cache file as last read or written by this process
+    _snapshot: Optional[Tuple[int, Dict[str, int], Dict[str, Dict[str, str]]]] = None
+    
+    # Sent per request too, so they apply on a shared session
+    TIMEOUT = aiohttp.ClientTimeout(total=30)
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+    }
     
-    def __init__(self):
-        self.session: Optional[aiohttp.ClientSession] = None
-        self.known_versions: Dict[str, str] = self._load_cache()
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None,
+                 exact_dedup: Optional[ExactDedup] = None):
+        # Shared run-wide session if given; otherwise one is opened in __aenter__
+        self.session = session
+        self._owns_session = session is None
+        # Shared across fetchers so cross-source repeats are dropped too
+        self.exact_dedup = exact_dedup or ExactDedup()
+        # entry key -> epoch seconds last seen, least recent first;
+        # changelog url -> {"etag", "last_modified", "sha"} of the last parsed page
+        self.known_versions, self.pages = self._load_cache()
+        self._cache_dirty = False
+        self._semaphore = asyncio.Semaphore(self.PROVIDER_CONCURRENCY)
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
-            }
-        )
+        if self._owns_session:
+            self.session = aiohttp.ClientSession(timeout=self.TIMEOUT, headers=self.HEADERS)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_session and self.session:
             await self.session.close()
         self._save_cache()
     
-    def _load_cache(self) -> Dict[str, str]:
-        """Load cached version data."""
+    def _load_cache(self) -> Tuple["OrderedDict[str, int]", Dict[str, Dict[str, str]]]:
+        """Load cached entries and page validators (reusing the last snapshot if unchanged)."""
         try:
-            if os.path.exists(self.CACHE_FILE):
-                with open(self.CACHE_FILE, 'r') as f:
-                    return json.load(f)
+            mtime = os.stat(self.CACHE_FILE).st_mtime_ns
+        except OSError:
+            return OrderedDict(), {}
+        
+        snapshot = LLMTracker._snapshot
+        if snapshot and snapshot[0] == mtime:
+            return OrderedDict(snapshot[1]), {url: dict(v) for url, v in snapshot[2].items()}
+        
+        try:
+            with open(self.CACHE_FILE, 'r') as f:
+                raw = json.load(f)
         except Exception:
-            pass
-        return {}
+            return OrderedDict(), {}
+        
+        # Older files were a flat {entry key: seen} dict
+        if "entries" not in raw:
+            raw = {"entries": raw, "pages": {}}
+        
+        entries = {}
+        for key, seen in raw["entries"].items():
+            if isinstance(seen, str):
+                # Older files stored str(datetime.now())
+                try:
+                    seen = int(datetime.fromisoformat(seen).timestamp())
+                except ValueError:
+                    seen = 0
+            entries[key] = int(seen)
+        
+        known = OrderedDict(sorted(entries.items(), key=lambda item: item[1]))
+        pages = raw.get("pages") or {}
+        LLMTracker._snapshot = (mtime, dict(known), pages)
+        return known, {url: dict(v) for url, v in pages.items()}
     
     def _save_cache(self):
-        """Save version data to cache."""
+        """Save version data to cache (atomically, newest MAX_CACHE_ENTRIES only)."""
+        if not self._cache_dirty:
+            return
+        
+        while len(self.known_versions) > self.MAX_CACHE_ENTRIES:
+            self.known_versions.popitem(last=False)
+        
+        tmp_path = f"{self.CACHE_FILE}.tmp"
         try:
             os.makedirs(os.path.dirname(self.CACHE_FILE), exist_ok=True)
-            with open(self.CACHE_FILE, 'w') as f:
-                json.dump(self.known_versions, f, indent=2)
+            with open(tmp_path, 'w') as f:
+                json.dump({"entries": self.known_versions, "pages": self.pages}, f, separators=(',', ':'))
+            os.replace(tmp_path, self.CACHE_FILE)
+            LLMTracker._snapshot = (
+                os.stat(self.CACHE_FILE).st_mtime_ns,
+                dict(self.known_versions),
+                {url: dict(v) for url, v in self.pages.items()}
+            )
+            self._cache_dirty = False
         except Exception as e:
             print(f"[LLM Tracker] Could not save cache: {e}")
     
     def _generate_id(self, provider: str, title: str) -> str:
-        """Generate unique ID."""
-        content = f"{provider}:{title}:{datetime.now().date()}"
-        return hashlib.md5(content.encode()).hexdigest()
+        """Generate unique ID (content only, so the same entry keeps its ID)."""
+        return make_id(f"{provider}:{title}")
     
     async def _check_provider(self, source: Dict) -> List[Article]:
         """Check a provider for updates."""
         articles = []
         provider = source["provider"]
+        url = source["changelog_url"]
+        page = self.pages.get(url, {})
+        
+        # Conditional GET: an unchanged changelog answers 304 without a body
+        headers = dict(self.HEADERS)
+        if page.get("etag"):
+            headers["If-None-Match"] = page["etag"]
+        if page.get("last_modified"):
+            headers["If-Modified-Since"] = page["last_modified"]
         
         try:
             # Try to fetch changelog
-            async with self.session.get(source["changelog_url"]) as response:
+            async with self._semaphore, self.session.get(
+                url, headers=headers, timeout=self.TIMEOUT
+            ) as response:
+                if response.status == 304:
+                    return articles
                 if response.status != 200:
                     return articles
                 
                 html = await response.text()
+                validators = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
             
-            soup = BeautifulSoup(html, 'lxml')
+            # Servers without validators: skip parsing if the body is byte-identical
+            sha = hashlib.blake2b(html.encode(), digest_size=16).hexdigest()
+            if page.get("sha") == sha:
+                return articles
+            
+            doc = lhtml.fromstring(html)
             
             # Look for recent entries (this varies by site)
             # We'll look for common patterns
@@ -143,44 +238,45 @@ class LLMTracker:
             entries = []
             
             # Try different selectors
-            for selector in [
-                'article', '.changelog-entry', '.release', 
-                '[class*="changelog"]', '[class*="release"]',
-                'h2', 'h3'
-            ]:
-                found = soup.select(selector)[:5]
+            for xpath in _ENTRY_XPATHS:
+                found = xpath(doc)[:5]
                 if found:
                     entries = found
                     break
             
             for entry in entries[:3]:
-                text = entry.get_text(strip=True)[:200]
+                # Same text as get_text(strip=True), so cache keys stay stable
+                text = "".join(part.strip() for part in _TEXT_XPATH(entry))[:200]
                 
                 # Check if this looks like a model update
-                model_mentioned = any(
-                    model.lower() in text.lower() 
-                    for model in source["models"]
-                )
-                
-                if model_mentioned or 'update' in text.lower() or 'release' in text.lower():
+                if source["_matcher"].matches(text.lower()):
                     # Check if we've seen this
                     entry_hash = hashlib.md5(text.encode()).hexdigest()[:8]
                     cache_key = f"{provider}:{entry_hash}"
                     
-                    if cache_key not in self.known_versions:
-                        self.known_versions[cache_key] = str(datetime.now())
-                        
+                    is_new = cache_key not in self.known_versions
+                    
+                    # Refresh on every sighting so pruning drops only entries gone from the page
+                    self.known_versions[cache_key] = int(time.time())
+                    self.known_versions.move_to_end(cache_key)
+                    self._cache_dirty = True
+                    
+                    if is_new:
                         article = Article(
                             id=self._generate_id(provider, text),
                             title=f"🔄 {provider}: {text[:80]}...",
                             url=source["changelog_url"],
-                            source=f"{provider} Updates",
+                            source=sys.intern(f"{provider} Updates"),
                             category="🚀 Lanzamientos de Modelos",
                             published=datetime.now(),
                             summary=f"New update from {provider}. Models: {', '.join(source['models'][:3])}. Check changelog for details."
                         )
                         articles.append(article)
             
+            # Remembered only once the page was parsed successfully
+            self.pages[url] = {"etag": validators[0], "last_modified": validators[1], "sha": sha}
+            self._cache_dirty = True
+            
             if articles:
                 print(f"[LLM Tracker] {provider}: Found {len(articles)} updates")
             
@@ -198,6 +294,7 @@ class LLMTracker:
         for result in results:
             if isinstance(result, list):
                 articles.extend(result)
+        articles = self.exact_dedup.filter(articles)
         
         # Always add a summary of tracked models if no specific updates
         if not articles:
@@ -6,50 +6,71 @@ Fetches and parses RSS feeds from various AI news sources.
 import feedparser
 import aiohttp
 import asyncio
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
-from dataclasses import dataclass
-import hashlib
+from datetime import datetime, timedelta, timezone
+from time import mktime
+from typing import List, Dict, Any, Optional, Tuple
+from lxml import etree
 
-
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: datetime
-    summary: str
-    content: Optional[str] = None
-    author: Optional[str] = None
+from scrapers.dates import parse_date
+from scrapers.exact_dedup import ExactDedup
+from scrapers.host_gate import HostGate, HostRateLimited
+from processing.article import Article, make_id
 
 
 class RSSFetcher:
     """Fetches articles from RSS feeds."""
     
-    def __init__(self, lookback_hours: int = 24):
+    # Sent per request too, so they apply on a shared session
+    TIMEOUT = aiohttp.ClientTimeout(total=30)
+    HEADERS = {
+        "User-Agent": "AI-News-Aggregator/1.0 (https://github.com/ai-news-bot)"
+    }
+    
+    ATOM_FEED = "{http://www.w3.org/2005/Atom}feed"
+    NAMESPACES = {
+        "atom": "http://www.w3.org/2005/Atom",
+        "content": "http://purl.org/rss/1.0/modules/content/",
+        "dc": "http://purl.org/dc/elements/1.1/",
+    }
+    
+    # Hard ceiling on feeds in flight, independent of the connector limits
+    MAX_CONCURRENT_FEEDS = 20
+    # Connect errors and timeouts get one retry after a short back-off
+    FETCH_ATTEMPTS = 2
+    RETRY_BACKOFF = 2.0
+    
+    # Reused for every feed; no DTDs, external entities or network lookups
+    _XML_PARSER = etree.XMLParser(resolve_entities=False, no_network=True)
+    
+    def __init__(self, lookback_hours: int = 24, gate: Optional[HostGate] = None,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 exact_dedup: Optional[ExactDedup] = None,
+                 use_lxml_fast: bool = True):
         self.lookback_hours = lookback_hours
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Parse plain RSS 2.0 / Atom directly with lxml, feedparser for the rest
+        self.use_lxml_fast = use_lxml_fast
+        # Shared run-wide session if given; otherwise one is opened in __aenter__
+        self.session = session
+        self._owns_session = session is None
+        # Shared across fetchers so cross-source repeats are dropped too
+        self.exact_dedup = exact_dedup or ExactDedup()
+        # Share one gate between fetchers so per-host limits are global
+        self.gate = gate or HostGate()
+        # rss_url -> (etag, last_modified) for every feed answered with 200 or 304
+        self.validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                "User-Agent": "AI-News-Aggregator/1.0 (https://github.com/ai-news-bot)"
-            }
-        )
+        if self._owns_session:
+            self.session = aiohttp.ClientSession(timeout=self.TIMEOUT, headers=self.HEADERS)
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_session and self.session:
             await self.session.close()
     
     def _generate_id(self, url: str, title: str) -> str:
         """Generate unique ID for an article."""
-        content = f"{url}:{title}"
-        return hashlib.md5(content.encode()).hexdigest()
+        return make_id(f"{url}:{title}")
     
     def _parse_date(self, entry: Dict) -> Optional[datetime]:
         """Parse date from RSS entry."""
@@ -57,7 +78,6 @@ class RSSFetcher:
         for field in ['published_parsed', 'updated_parsed', 'created_parsed']:
             if field in entry and entry[field]:
                 try:
-                    from time import mktime
                     return datetime.fromtimestamp(mktime(entry[field]))
                 except Exception:
                     continue
@@ -65,14 +85,94 @@ class RSSFetcher:
         # Try string dates
         for field in ['published', 'updated', 'created']:
             if field in entry and entry[field]:
-                try:
-                    from dateutil.parser import parse
-                    return parse(entry[field])
-                except Exception:
-                    continue
+                parsed = self._parse_date_text(entry[field])
+                if parsed:
+                    return parsed
         
         return None
     
+    @staticmethod
+    def _parse_date_text(text: Optional[str]) -> Optional[datetime]:
+        """Parse an RFC 822 or ISO 8601 date as naive UTC (like feedparser's *_parsed)."""
+        parsed = parse_date(text)
+        if parsed is not None and parsed.tzinfo is not None:
+            parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+        return parsed
+    
+    @staticmethod
+    def _plain_text(elem) -> Optional[str]:
+        return "".join(elem.itertext()).strip() if elem is not None else None
+    
+    @staticmethod
+    def _element_text(elem) -> str:
+        """Text of an element; inline XHTML children are kept as markup."""
+        if elem is None:
+            return ""
+        if len(elem):
+            return (elem.text or "") + "".join(etree.tostring(child, encoding=str) for child in elem)
+        return elem.text or ""
+    
+    def _parse_entries_fast(self, data: bytes) -> Optional[List[Dict[str, Any]]]:
+        """Extract entries from RSS 2.0 or Atom with lxml; None if it can't (use feedparser)."""
+        try:
+            root = etree.fromstring(data, self._XML_PARSER)
+        except etree.XMLSyntaxError:
+            return None
+        
+        ns = self.NAMESPACES
+        entries = []
+        
+        if root.tag == "rss":
+            for item in root.iterfind("channel/item"):
+                content = item.find("content:encoded", ns)
+                published = item.findtext("pubDate") or item.findtext("dc:date", namespaces=ns)
+                entries.append({
+                    "title": self._plain_text(item.find("title")),
+                    "link": (item.findtext("link") or "").strip(),
+                    "published": self._parse_date_text(published),
+                    "summary": self._element_text(content if content is not None else item.find("description")),
+                    "author": item.findtext("author") or item.findtext("dc:creator", namespaces=ns),
+                })
+        elif root.tag == self.ATOM_FEED:
+            for item in root.iterfind("atom:entry", ns):
+                link = next(
+                    (l.get("href") for l in item.iterfind("atom:link", ns)
+                     if l.get("rel", "alternate") == "alternate"),
+                    ""
+                )
+                content = item.find("atom:content", ns)
+                published = item.findtext("atom:published", namespaces=ns) or item.findtext("atom:updated", namespaces=ns)
+                entries.append({
+                    "title": self._plain_text(item.find("atom:title", ns)),
+                    "link": (link or "").strip(),
+                    "published": self._parse_date_text(published),
+                    "summary": self._element_text(content if content is not None else item.find("atom:summary", ns)),
+                    "author": item.findtext("atom:author/atom:name", namespaces=ns),
+                })
+        else:
+            return None
+        
+        return entries
+    
+    def _parse_entries_feedparser(self, data: bytes, source_name: str) -> List[Dict[str, Any]]:
+        """Extract entries with feedparser (RSS 1.0, malformed feeds, HTML entities...)."""
+        feed = feedparser.parse(data)
+        
+        if feed.bozo and not feed.entries:
+            print(f"[RSS] Error parsing {source_name}: {feed.bozo_exception}")
+            return []
+        
+        return [
+            {
+                "title": entry.get('title'),
+                "link": entry.get('link', ''),
+                "published": self._parse_date(entry),
+                "summary": self._extract_content(entry),
+                "author": entry.get('author', None),
+            }
+            for entry in feed.entries
+        ]
+    
     def _extract_content(self, entry: Dict) -> str:
         """Extract content/summary from RSS entry."""
         # Try content field first
@@ -89,31 +189,68 @@ class RSSFetcher:
         
         return ""
     
-    async def fetch_feed(self, rss_url: str, source_name: str, category: str) -> List[Article]:
-        """Fetch articles from a single RSS feed."""
+    async def _get(self, url: str, headers: Dict[str, str]) -> Tuple[int, Any, bytes]:
+        """GET url through the host gate; returns status, headers and body (200 only)."""
+        for attempt in range(self.FETCH_ATTEMPTS):
+            try:
+                async with self.gate.request(url), \
+                        self.session.get(url, headers=headers, timeout=self.TIMEOUT) as response:
+                    body = await response.read() if response.status == 200 else b""
+                    return response.status, response.headers, body
+            except (aiohttp.ClientConnectorError, asyncio.TimeoutError):
+                if attempt + 1 == self.FETCH_ATTEMPTS:
+                    raise
+                await asyncio.sleep(self.RETRY_BACKOFF * 2 ** attempt)
+    
+    async def fetch_feed(
+        self,
+        rss_url: str,
+        source_name: str,
+        category: str,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ) -> List[Article]:
+        """Fetch articles from a single RSS feed (conditional GET if validators given)."""
         articles = []
         cutoff_time = datetime.now() - timedelta(hours=self.lookback_hours)
         
+        headers = dict(self.HEADERS)
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        
         try:
             # Fetch the feed
-            async with self.session.get(rss_url) as response:
-                if response.status != 200:
-                    print(f"[RSS] Error fetching {source_name}: HTTP {response.status}")
-                    return articles
-                
-                content = await response.text()
+            status, response_headers, content = await self._get(rss_url, headers)
+            if status == 429:
+                delay = self.gate.back_off(rss_url, response_headers.get("Retry-After"))
+                print(f"[RSS] {source_name}: Rate limited, backing off {delay:.0f}s")
+                return articles
             
-            # Parse the feed
-            feed = feedparser.parse(content)
+            if status == 304:
+                print(f"[RSS] {source_name}: Not modified")
+                self.validators[rss_url] = (etag, last_modified)
+                return articles
             
-            if feed.bozo and not feed.entries:
-                print(f"[RSS] Error parsing {source_name}: {feed.bozo_exception}")
+            if status != 200:
+                print(f"[RSS] Error fetching {source_name}: HTTP {status}")
                 return articles
             
+            self.validators[rss_url] = (
+                response_headers.get("ETag"),
+                response_headers.get("Last-Modified"),
+            )
+            
+            # Parse the feed
+            entries = self._parse_entries_fast(content) if self.use_lxml_fast else None
+            if entries is None:
+                entries = self._parse_entries_feedparser(content, source_name)
+            
             # Process entries
-            for entry in feed.entries:
+            for entry in entries:
                 # Get publication date
-                pub_date = self._parse_date(entry)
+                pub_date = entry['published']
                 
                 # Skip if no date or too old
                 if pub_date is None:
@@ -122,8 +259,8 @@ class RSSFetcher:
                     continue
                 
                 # Extract article data
-                title = entry.get('title', 'No Title')
-                url = entry.get('link', '')
+                title = entry['title'] or 'No Title'
+                url = entry['link']
                 
                 if not url:
                     continue
@@ -135,14 +272,16 @@ class RSSFetcher:
                     source=source_name,
                     category=category,
                     published=pub_date,
-                    summary=self._extract_content(entry)[:500],  # Limit summary length
-                    author=entry.get('author', None)
+                    summary=entry['summary'][:500],  # Limit summary length
+                    author=entry['author']
                 )
                 
                 articles.append(article)
             
             print(f"[RSS] {source_name}: Found {len(articles)} recent articles")
             
+        except HostRateLimited as e:
+            print(f"[RSS] {source_name}: Skipped, {e}")
         except asyncio.TimeoutError:
             print(f"[RSS] Timeout fetching {source_name}")
         except Exception as e:
@@ -155,16 +294,25 @@ class RSSFetcher:
         Fetch articles from multiple RSS sources.
         
         Args:
-            sources: List of dicts with 'rss_url', 'name', 'category'
+            sources: List of dicts with 'rss_url', 'name', 'category' and
+                optional 'etag' / 'last_modified' validators
         
         Returns:
             List of all articles from all sources
         """
+        limit = asyncio.Semaphore(self.MAX_CONCURRENT_FEEDS)
+        
+        async def fetch_limited(*args, **kwargs) -> List[Article]:
+            async with limit:
+                return await self.fetch_feed(*args, **kwargs)
+        
         tasks = [
-            self.fetch_feed(
+            fetch_limited(
                 source['rss_url'],
                 source['name'],
-                source['category']
+                source['category'],
+                etag=source.get('etag'),
+                last_modified=source.get('last_modified')
             )
             for source in sources
             if source.get('rss_url')
@@ -179,7 +327,7 @@ class RSSFetcher:
             elif isinstance(result, Exception):
                 print(f"[RSS] Batch error: {result}")
         
-        return all_articles
+        return self.exact_dedup.filter(all_articles)
 
 
 # Convenience function for standalone usage
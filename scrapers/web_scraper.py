@@ -5,65 +5,205 @@ Scrapes content from websites without RSS feeds.
 
 import aiohttp
 import asyncio
-from bs4 import BeautifulSoup
+import json
+import os
 from datetime import datetime, timedelta
-from typing import List, Optional
-from dataclasses import dataclass
-import hashlib
-import re
+from typing import Dict, List, Optional
+from lxml import etree, html as lhtml
 
+from scrapers.exact_dedup import ExactDedup
+from scrapers.host_gate import HostGate, HostRateLimited
+from processing.article import Article, make_id
 
-@dataclass
-class Article:
-    """Represents a single news article."""
-    id: str
-    title: str
-    url: str
-    source: str
-    category: str
-    published: datetime
-    summary: str
-    content: Optional[str] = None
-    author: Optional[str] = None
+
+# XPath equivalents of the CSS selectors the scrapers use, compiled once
+# (document order, like soup.select / select_one; no cssselect needed)
+_HAS_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+# article, .post, .entry
+_POST_XPATH = etree.XPath(
+    f"//*[self::article or {_HAS_CLASS.format('post')} or {_HAS_CLASS.format('entry')}]"
+)
+# h2 a, h3 a, .entry-title a
+_POST_TITLE_XPATH = etree.XPath(
+    f"(.//a[ancestor::h2 or ancestor::h3 or ancestor::*[{_HAS_CLASS.format('entry-title')}]])[1]"
+)
+# p, .excerpt, .summary
+_POST_SUMMARY_XPATH = etree.XPath(
+    f"(.//*[self::p or {_HAS_CLASS.format('excerpt')} or {_HAS_CLASS.format('summary')}])[1]"
+)
+# .card, [class*="model"], [class*="benchmark"]
+_CARD_XPATH = etree.XPath(
+    f"//*[{_HAS_CLASS.format('card')} or contains(@class, 'model') or contains(@class, 'benchmark')]"
+)
+# a[href*="paper"]
+_PAPER_LINK_XPATH = etree.XPath("//a[contains(@href, 'paper')]")
+# Visible text only, like BeautifulSoup's get_text()
+_TEXT_XPATH = etree.XPath(".//text()[not(ancestor::script or ancestor::style)]", smart_strings=False)
+
+# One HTML parser per charset, reused across pages; no id index or comment
+# nodes (nothing looks up ids, comments never reach the extracted text)
+_HTML_PARSERS: Dict[str, lhtml.HTMLParser] = {}
+
+
+def _html_parser(encoding: Optional[str] = None) -> lhtml.HTMLParser:
+    parser = _HTML_PARSERS.get(encoding)
+    if parser is None:
+        parser = _HTML_PARSERS[encoding] = lhtml.HTMLParser(
+            encoding=encoding, collect_ids=False, remove_comments=True
+        )
+    return parser
+
+
+def _parse_html(body: bytes, charset: str) -> lhtml.HtmlElement:
+    """Parse raw page bytes; libxml2 decodes them in C."""
+    try:
+        return lhtml.fromstring(body, parser=_html_parser(charset))
+    except LookupError:
+        # A charset name libxml2 doesn't know (e.g. "latin-1")
+        return lhtml.fromstring(body.decode(charset), parser=_html_parser())
 
 
 class WebScraper:
     """Scrapes articles from websites without RSS feeds."""
     
-    def __init__(self, lookback_hours: int = 24):
+    # Pages fetched at once, across all scrapers
+    PAGE_CONCURRENCY = 8
+    
+    # Longer bodies are cut here (listing pages are well under this)
+    MAX_PAGE_BYTES = 1024 * 1024
+    
+    # Last body and ETag/Last-Modified of each page, for conditional GETs:
+    # <id>.html holds the body, <id>.json its url, validators and charset
+    CACHE_DIR = os.path.join(os.path.dirname(__file__), "..", "data", "web_cache")
+    
+    # Sent per request too, so they apply on a shared session
+    TIMEOUT = aiohttp.ClientTimeout(total=30)
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+    }
+    
+    def __init__(self, lookback_hours: int = 24, gate: Optional[HostGate] = None,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 exact_dedup: Optional[ExactDedup] = None):
         self.lookback_hours = lookback_hours
-        self.session: Optional[aiohttp.ClientSession] = None
+        # Shared run-wide session if given; otherwise one is opened in __aenter__
+        self.session = session
+        self._owns_session = session is None
+        # Shared across fetchers so cross-source repeats are dropped too
+        self.exact_dedup = exact_dedup or ExactDedup()
+        # Share one gate between fetchers so per-host limits are global
+        self.gate = gate or HostGate()
+        self._semaphore = asyncio.Semaphore(self.PAGE_CONCURRENCY)
     
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-            }
-        )
+        if self._owns_session:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=32, limit_per_host=8, ttl_dns_cache=300,
+                    keepalive_timeout=60, enable_cleanup_closed=True
+                ),
+                timeout=self.TIMEOUT,
+                headers=self.HEADERS
+            )
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
+        if self._owns_session and self.session:
             await self.session.close()
     
     def _generate_id(self, url: str) -> str:
         """Generate unique ID from URL."""
-        return hashlib.md5(url.encode()).hexdigest()
+        return make_id(url)
     
     def _clean_text(self, text: str) -> str:
         """Clean text by removing extra whitespace."""
-        return re.sub(r'\s+', ' ', text).strip()
+        return " ".join(text.split())
     
-    async def _fetch_html(self, url: str) -> Optional[str]:
-        """Fetch HTML content from URL."""
+    def _element_text(self, element: etree._Element) -> str:
+        """Cleaned visible text of an element."""
+        return self._clean_text("".join(_TEXT_XPATH(element)))
+    
+    def _cache_path(self, url: str, ext: str) -> str:
+        return os.path.join(self.CACHE_DIR, f"{make_id(url)}.{ext}")
+    
+    def _load_validators(self, url: str) -> Optional[Dict[str, str]]:
+        """Validators and charset of the cached copy of url, if any."""
         try:
-            async with self.session.get(url) as response:
+            with open(self._cache_path(url, "json"), 'r') as f:
+                cached = json.load(f)
+        except Exception:
+            return None
+        return cached if cached.get("url") == url else None
+    
+    def _save_page(self, url: str, body: bytes, charset: str, etag: Optional[str],
+                   last_modified: Optional[str]):
+        """Cache a page that can be revalidated (atomically, body first)."""
+        if not etag and not last_modified:
+            return
+        
+        try:
+            os.makedirs(self.CACHE_DIR, exist_ok=True)
+            for ext, data, mode in (
+                ("html", body, 'wb'),
+                ("json", json.dumps({
+                    "url": url, "etag": etag, "last_modified": last_modified, "charset": charset
+                }), 'w'),
+            ):
+                path = self._cache_path(url, ext)
+                with open(f"{path}.tmp", mode) as f:
+                    f.write(data)
+                os.replace(f"{path}.tmp", path)
+        except Exception as e:
+            print(f"[Web] Could not cache {url}: {e}")
+    
+    async def _read_body(self, response: aiohttp.ClientResponse, url: str) -> bytes:
+        """Read at most MAX_PAGE_BYTES of a response body."""
+        body = bytearray()
+        while len(body) < self.MAX_PAGE_BYTES:
+            chunk = await response.content.read(self.MAX_PAGE_BYTES - len(body))
+            if not chunk:
+                return bytes(body)
+            body += chunk
+        
+        if not response.content.at_eof():
+            print(f"[Web] {url}: Page truncated to {self.MAX_PAGE_BYTES // 1024} KB")
+        return bytes(body)
+    
+    async def _fetch_page(self, url: str) -> Optional[lhtml.HtmlElement]:
+        """Fetch and parse a page from URL (conditional GET against the cached copy)."""
+        cached = self._load_validators(url)
+        headers = dict(self.HEADERS)
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+        
+        try:
+            async with self._semaphore, self.gate.request(url), self.session.get(
+                url, headers=headers, timeout=self.TIMEOUT
+            ) as response:
                 if response.status == 200:
-                    return await response.text()
+                    # Same charset response.text() would use (Content-Type, else UTF-8)
+                    body = await self._read_body(response, url)
+                    charset = response.charset or "utf-8"
+                    self._save_page(
+                        url, body, charset,
+                        response.headers.get("ETag"), response.headers.get("Last-Modified")
+                    )
+                    return _parse_html(body, charset)
+                elif response.status == 304 and cached:
+                    with open(self._cache_path(url, "html"), 'rb') as f:
+                        return _parse_html(f.read(), cached["charset"])
+                elif response.status == 429:
+                    delay = self.gate.back_off(url, response.headers.get("Retry-After"))
+                    print(f"[Web] Rate limited by {url}, backing off {delay:.0f}s")
+                    return None
                 else:
                     print(f"[Web] Error fetching {url}: HTTP {response.status}")
                     return None
+        except HostRateLimited as e:
+            print(f"[Web] Skipped {url}: {e}")
+            return None
         except Exception as e:
             print(f"[Web] Error fetching {url}: {e}")
             return None
@@ -71,32 +211,32 @@ class WebScraper:
     async def scrape_thisdayinai(self) -> List[Article]:
         """Scrape ThisDayInAI.com for today's AI news."""
         articles = []
+        # One timestamp for every item of this scrape
+        now = datetime.now()
         url = "https://thisdayinai.com/"
         
         try:
-            html = await self._fetch_html(url)
-            if not html:
+            doc = await self._fetch_page(url)
+            if doc is None:
                 return articles
             
-            soup = BeautifulSoup(html, 'lxml')
-            
             # Find article containers
-            for article_elem in soup.select('article, .post, .entry')[:10]:
+            for article_elem in _POST_XPATH(doc)[:10]:
                 try:
                     # Title and link
-                    title_elem = article_elem.select_one('h2 a, h3 a, .entry-title a')
+                    title_elem = _POST_TITLE_XPATH(article_elem)
                     if not title_elem:
                         continue
                     
-                    title = self._clean_text(title_elem.get_text())
-                    link = title_elem.get('href', '')
+                    title = self._element_text(title_elem[0])
+                    link = title_elem[0].get('href', '')
                     
                     if not link or not title:
                         continue
                     
                     # Summary
-                    summary_elem = article_elem.select_one('p, .excerpt, .summary')
-                    summary = self._clean_text(summary_elem.get_text()) if summary_elem else ""
+                    summary_elem = _POST_SUMMARY_XPATH(article_elem)
+                    summary = self._element_text(summary_elem[0]) if summary_elem else ""
                     
                     article = Article(
                         id=self._generate_id(link),
@@ -104,7 +244,7 @@ class WebScraper:
                         url=link,
                         source="ThisDayInAI",
                         category="📰 Noticias de Industria",
-                        published=datetime.now(),  # Assume today
+                        published=now,  # Assume today
                         summary=summary[:300]
                     )
                     articles.append(article)
@@ -122,28 +262,28 @@ class WebScraper:
     async def scrape_artificial_analysis(self) -> List[Article]:
         """Scrape Artificial Analysis for benchmark updates."""
         articles = []
+        # One timestamp for every item of this scrape
+        now = datetime.now()
         url = "https://artificialanalysis.ai/"
         
         try:
-            html = await self._fetch_html(url)
-            if not html:
+            doc = await self._fetch_page(url)
+            if doc is None:
                 return articles
             
-            soup = BeautifulSoup(html, 'lxml')
-            
             # Look for benchmark/model cards or news sections
             # This site is dynamic, so we'll extract what we can
-            cards = soup.select('.card, [class*="model"], [class*="benchmark"]')[:5]
+            cards = _CARD_XPATH(doc)[:5]
             
             if not cards:
                 # Create a general update article
                 article = Article(
-                    id=self._generate_id(f"{url}-{datetime.now().date()}"),
+                    id=self._generate_id(f"{url}-{now.date()}"),
                     title="📊 Artificial Analysis - Benchmark Updates",
                     url=url,
                     source="Artificial Analysis",
                     category="📊 Benchmarks & Rankings",
-                    published=datetime.now(),
+                    published=now,
                     summary="Check the latest AI model benchmarks, pricing, and performance comparisons at Artificial Analysis."
                 )
                 articles.append(article)
@@ -158,24 +298,24 @@ class WebScraper:
     async def scrape_paper_digest(self) -> List[Article]:
         """Scrape Paper Digest for trending research."""
         articles = []
+        # One timestamp for every item of this scrape
+        now = datetime.now()
         url = "https://www.paperdigest.org/2024/12/"  # Will need date formatting
         
         # Use current month URL
-        current_month = datetime.now().strftime("%Y/%m/")
+        current_month = now.strftime("%Y/%m/")
         url = f"https://www.paperdigest.org/{current_month}"
         
         try:
-            html = await self._fetch_html(url)
-            if not html:
+            doc = await self._fetch_page(url)
+            if doc is None:
                 # Fallback to main page
-                html = await self._fetch_html("https://www.paperdigest.org/")
+                doc = await self._fetch_page("https://www.paperdigest.org/")
             
-            if html:
-                soup = BeautifulSoup(html, 'lxml')
-                
+            if doc is not None:
                 # Find article links
-                for link in soup.select('a[href*="paper"]')[:10]:
-                    title = self._clean_text(link.get_text())
+                for link in _PAPER_LINK_XPATH(doc)[:10]:
+                    title = self._element_text(link)
                     href = link.get('href', '')
                     
                     if len(title) > 20 and href:
@@ -185,7 +325,7 @@ class WebScraper:
                             url=href if href.startswith('http') else f"https://www.paperdigest.org{href}",
                             source="Paper Digest",
                             category="📄 Research & Papers",
-                            published=datetime.now(),
+                            published=now,
                             summary=title
                         )
                         articles.append(article)
@@ -207,13 +347,18 @@ class WebScraper:
         )
         
         articles = []
+        seen_urls = set()
         for result in results:
             if isinstance(result, list):
-                articles.extend(result)
+                # Same link from two scrapers (or twice on a page): keep the first
+                for article in result:
+                    if article.url not in seen_urls:
+                        seen_urls.add(article.url)
+                        articles.append(article)
             elif isinstance(result, Exception):
                 print(f"[Web] Scraper error: {result}")
         
-        return articles
+        return self.exact_dedup.filter(articles)
 
 
 # Convenience function
@@ -0,0 +1,75 @@
+"""Tests for main.AINewsAggregator."""
+
+import asyncio
+import unittest
+from dataclasses import replace
+from datetime import datetime
+from unittest import mock
+
+import main
+
+
+class _FakeFetcher:
+    """Async context manager standing in for every fetcher; records RSS sources."""
+    
+    rss_sources = None
+    
+    def __init__(self, *args, **kwargs):
+        pass
+    
+    async def __aenter__(self):
+        self.validators = {}
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+    
+    async def fetch_all(self, sources=None):
+        if sources is not None:
+            _FakeFetcher.rss_sources = sources
+        return []
+    
+    async def fetch_papers(self, lookback_hours=24):
+        return []
+    
+    async def check_all_providers(self):
+        return []
+
+
+class _FakeDedup:
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class GithubPagesFetchTest(unittest.TestCase):
+    
+    def test_github_pages_run_fetches_recently_polled_feeds(self):
+        aggregator = main.AINewsAggregator()
+        aggregator.source_state = tuple(
+            replace(s, etag='"v1"', last_fetched_at=datetime.now())
+            for s in aggregator.source_state
+        )
+        expected = sorted(s.rss_url for s in aggregator.source_state if s.enabled and s.rss_url)
+        
+        patches = [
+            mock.patch.object(main, name, _FakeFetcher)
+            for name in ("RSSFetcher", "ArxivFetcher", "HuggingFaceFetcher", "WebScraper", "LLMTracker")
+        ]
+        patches.append(mock.patch.object(main, "Deduplicator", _FakeDedup))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        
+        _FakeFetcher.rss_sources = None
+        asyncio.run(aggregator.run(github_pages=True))
+        
+        self.assertEqual(sorted(s["rss_url"] for s in _FakeFetcher.rss_sources), expected)
+        self.assertTrue(all(s["etag"] is None for s in _FakeFetcher.rss_sources))
+
+
+if __name__ == "__main__":
+    unittest.main()
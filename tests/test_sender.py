@@ -0,0 +1,28 @@
+"""Tests for email_system.sender."""
+
+import smtplib
+import unittest
+from unittest import mock
+
+from email_system.sender import EmailSender
+
+
+class SendPersonalizedTest(unittest.TestCase):
+    
+    def test_421_while_connecting_is_counted_as_failure(self):
+        sender = EmailSender("smtp.example.com", 587, "user", "secret")
+        refused = smtplib.SMTPConnectError(421, "Service not available")
+        
+        with mock.patch("email_system.sender.smtplib.SMTP", side_effect=refused), \
+                mock.patch("email_system.sender.time.sleep"):
+            sent = sender.send_personalized(
+                [("a@example.com", None, None), ("b@example.com", None, None)],
+                "Subject",
+                "<p>Hola</p>"
+            )
+        
+        self.assertEqual(sent, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+"""Tests for processing.summarizer."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from processing import gtrans_async, summarizer
+from processing.summarizer import Summarizer
+
+
+class TranslateTest(unittest.TestCase):
+    
+    def test_empty_translation_keeps_original_and_is_not_memoized(self):
+        instance = Summarizer.__new__(Summarizer)
+        instance.session = None
+        instance.cache = None
+        
+        with mock.patch.object(gtrans_async, "translate", mock.AsyncMock(return_value="")):
+            result = asyncio.run(instance._translate("OpenAI ships a new model"))
+        
+        self.assertEqual(result, "OpenAI ships a new model")
+        self.assertNotIn("OpenAI ships a new model", summarizer._TRANSLATION_MEMO)
+
+
+if __name__ == "__main__":
+    unittest.main()